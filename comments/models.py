@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
-from posts.models import Post
+from posts.models import Post, mark_trending_deleted, mark_trending_dirty
+from drf_api.cache import bump_generation
 
 
 class Comment(models.Model):
@@ -15,6 +18,39 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        # Keyset (cursor) pagination on (created_at, id), see drf_api/pagination.py;
+        # the comments of one post are a range of the second index
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['post', '-created_at', '-id']),
+        ]
 
     def __str__(self):
-        return self.content
\ No newline at end of file
+        return self.content
+
+
+# Keep Post.comments_count in step with the Comment rows,
+# see likes/models.py for the likes counterpart.
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=F('comments_count') + 1
+        )
+
+
+def decrement_comments_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(
+        comments_count=F('comments_count') - 1
+    )
+
+
+post_save.connect(increment_comments_count, sender=Comment)
+post_delete.connect(decrement_comments_count, sender=Comment)
+
+# Comments change the post's trending score (posts/trending.py)
+post_save.connect(mark_trending_dirty, sender=Comment)
+post_delete.connect(mark_trending_deleted, sender=Comment)
+
+# Invalidate the cached anonymous responses built from Comments (drf_api/cache.py)
+post_save.connect(bump_generation, sender=Comment)
+post_delete.connect(bump_generation, sender=Comment)
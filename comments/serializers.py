@@ -1,16 +1,23 @@
-from django.contrib.humanize.templatetags.humanize import naturaltime
 from rest_framework import serializers
+from drf_api.fast import FastSerializer, ImageURL, IsOwner, Method, Timestamp, Value
+from drf_api.fieldsets import SparseFieldsetSerializerMixin
+from drf_api.media import MediaURLField
+from drf_api.timestamps import TimestampField
+from profiles.models import Profile
 from .models import Comment
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = MediaURLField(source='owner.profile.image')
     is_owner = serializers.SerializerMethodField()
     post_info = serializers.SerializerMethodField()
-    created_at = serializers.SerializerMethodField()
-    updated_at = serializers.SerializerMethodField()
+    # "2 minutes ago" by default, or ?timestamps=iso|epoch (drf_api/timestamps.py)
+    created_at = TimestampField()
+    updated_at = TimestampField()
+    # Relations read by the method fields, see drf_api/checks.py
+    related_sources = ['owner', 'post.owner.username', 'post.title']
 
     def get_post_info(self,obj):
         return {
@@ -44,12 +51,6 @@ class CommentSerializer(serializers.ModelSerializer):
         request = self.context['request']
         return request.user == obj.owner
 
-    def get_created_at(self, obj):
-        return naturaltime(obj.created_at)
-
-    def get_updated_at(self, obj):
-        return naturaltime(obj.updated_at)
-
     class Meta:
         model = Comment
         fields = ['id', 'owner', 'is_owner', 'profile_id', 'profile_image',
@@ -61,9 +62,29 @@ class CommentSerializer(serializers.ModelSerializer):
 # CommentSerializer. This means it will have fields like id, owner, is_owner,
 # profile_id, profile_image, created_at, updated_at, and content.
 class CommentDetailSerializer(CommentSerializer):
-    post = serializers.ReadOnlyField(source='painting.id')
+    post = serializers.ReadOnlyField(source='post.id')
 
 # By having two serializers:
 # CommentSerializer can be used for creating comments where the post field is writable.
 # CommentDetailSerializer can be used for editing comments where the post field is read-only.
 
+
+def post_info(row):
+    return {'username': row['post__owner__username'], 'title': row['post__title']}
+
+
+class FastCommentSerializer(FastSerializer):
+    """CommentSerializer for list responses, see drf_api/fast.py."""
+    serializer_class = CommentSerializer
+    fields = {
+        'id': Value('id'),
+        'owner': Value('owner__username'),
+        'is_owner': IsOwner('owner_id'),
+        'profile_id': Value('owner__profile__id'),
+        'profile_image': ImageURL('owner__profile__image', Profile, 'image'),
+        'post': Value('post'),
+        'post_info': Method(post_info, 'post__owner__username', 'post__title'),
+        'created_at': Timestamp('created_at'),
+        'updated_at': Timestamp('updated_at'),
+        'content': Value('content'),
+    }
@@ -1,3 +1,92 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from drf_api import timestamps
+from posts.models import Post
+from .models import Comment
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=300)
+class CommentResponseCacheTests(APITestCase):
+    def setUp(self):
+        caches['default'].clear()
+        owner = User.objects.create_user('owner', password='pass')
+        post = Post.objects.create(owner=owner, title='title')
+        Comment.objects.create(owner=owner, post=post, content='content')
+
+    def get(self, url, now):
+        with mock.patch.object(timestamps.time, 'time', return_value=now):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache']
+
+    def test_natural_timestamps_are_cached_within_the_minute(self):
+        now = 1_700_000_000 - 1_700_000_000 % 60
+        self.assertEqual(self.get('/comments/', now), 'MISS')
+        self.assertEqual(self.get('/comments/', now + 30), 'HIT')
+        self.assertEqual(self.get('/comments/', now + 60), 'MISS')
+
+    def test_absolute_timestamps_are_cached_across_minutes(self):
+        now = 1_700_000_000
+        self.assertEqual(self.get('/comments/?timestamps=iso', now), 'MISS')
+        self.assertEqual(self.get('/comments/?timestamps=iso', now + 120), 'HIT')
+
+
+class PostCommentListTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.post = Post.objects.create(owner=self.owner, title='title')
+        self.url = f'/posts/{self.post.pk}/comments/'
+
+    def comment(self, content='content'):
+        return Comment.objects.create(owner=self.owner, post=self.post, content=content)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def ids(self, data):
+        return [comment['id'] for comment in data['results']]
+
+    def test_pages_are_newest_first(self):
+        comments = [self.comment() for _ in range(12)]
+        Comment.objects.create(
+            owner=self.owner, post=Post.objects.create(owner=self.owner, title='other'),
+            content='elsewhere',
+        )
+        ids, url = [], self.url
+        while url:
+            data = self.get(url)
+            ids.extend(self.ids(data))
+            url = data['next']
+        self.assertEqual(ids, [comment.pk for comment in reversed(comments)])
+
+    def test_poll_returns_the_comments_added_since(self):
+        self.comment()
+        poll = self.get(self.url)['poll']
+        data = self.get(poll)
+        self.assertEqual(self.ids(data), [])
+        self.assertEqual(data['poll'], poll)
+
+        new = [self.comment(), self.comment()]
+        data = self.get(poll)
+        self.assertEqual(self.ids(data), [comment.pk for comment in new])
+        self.assertEqual(self.ids(self.get(data['poll'])), [])
+
+    def test_poll_of_a_post_without_comments(self):
+        poll = self.get(self.url)['poll']
+        comment = self.comment()
+        self.assertEqual(self.ids(self.get(poll)), [comment.pk])
+
+    def test_invalid_poll_position(self):
+        self.assertEqual(self.client.get(self.url + '?after=nope').status_code, 404)
+
+    def test_missing_post(self):
+        missing = f'/posts/{self.post.pk + 1}/comments/'
+        self.assertEqual(self.client.get(missing).status_code, 404)
+        self.assertEqual(self.client.get(missing + '?after=nope').status_code, 404)
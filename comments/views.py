@@ -1,26 +1,51 @@
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions
+from drf_api.cache import AnonymousResponseCacheMixin
+from drf_api.conditional import ConditionalDetailMixin
+from drf_api.fast import FastListMixin
+from drf_api.fieldsets import SparseFieldsetMixin
+from drf_api.pagination import PollingCursorPagination
+from drf_api.timestamps import format_timestamp, get_mode
 from drf_api.permissions import IsOwnerOrReadOnly
+from posts.models import Post
 from .models import Comment
-from .serializers import CommentSerializer, CommentDetailSerializer
+from .serializers import (
+    CommentDetailSerializer, CommentSerializer, FastCommentSerializer,
+)
 from django_filters.rest_framework import DjangoFilterBackend
 
 
+# Everything a comment response is built from, see drf_api/cache.py
+COMMENT_CACHE_MODELS = [
+    'comments.Comment', 'posts.Post', 'profiles.Profile', 'auth.User',
+]
+
+
 # CommentList is a class that inherits from generics.ListCreateAPIView.
 # This is a generic view provided by Django REST Framework (DRF) which
 # is used for read-write endpoints to represent a collection of model
 # instances. It provides functionality to list a queryset or create a
 # new model instance.
-class CommentList(generics.ListCreateAPIView):
+class CommentList(
+    AnonymousResponseCacheMixin, FastListMixin, SparseFieldsetMixin,
+    generics.ListCreateAPIView
+):
+    cache_models = COMMENT_CACHE_MODELS
+    # created_at/updated_at default to "3 minutes ago" (drf_api/timestamps.py)
+    natural_timestamps = True
     # queryset: This attribute defines the set of Comment model instances that
     # this view will operate on. Comment.objects.all() indicates that the view
     # will handle all instances of the Comment model.
-    queryset = Comment.objects.all()
+    # select_related loads the related rows CommentSerializer reads in the
+    # same query (see drf_api/checks.py)
+    queryset = Comment.objects.select_related('owner__profile', 'post__owner')
     # serializer_class: This attribute tells DRF which serializer to use when
     # processing the input (for creating new Comment instances) and output (when
     # listing existing comments). The CommentSerializer is responsible for
     # converting the Comment model instances to JSON format for API responses
     # and vice-versa for API requests.
     serializer_class = CommentSerializer
+    fast_serializer_class = FastCommentSerializer
     # permission_classes: This list of permission classes is used to control
     # access to this view. permissions.IsAuthenticatedOrReadOnly ensures that
     # only authenticated users can create new comments (POST request), but any
@@ -57,11 +82,56 @@ class CommentList(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Comment.objects.all()
+class PostCommentList(
+    AnonymousResponseCacheMixin, FastListMixin, SparseFieldsetMixin,
+    generics.ListAPIView
+):
+    """
+    The comments of a post, newest first, in keyset pages read from the
+    (post, created_at, id) index. Clients poll the `poll` link for the
+    comments added since (see PollingCursorPagination).
+    """
+    cache_models = COMMENT_CACHE_MODELS
+    # created_at/updated_at default to "3 minutes ago" (drf_api/timestamps.py)
+    natural_timestamps = True
+    queryset = Comment.objects.select_related('owner__profile', 'post__owner')
+    serializer_class = CommentSerializer
+    fast_serializer_class = FastCommentSerializer
+    pagination_class = PollingCursorPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        # A missing post is a 404, not an empty list
+        post = get_object_or_404(Post.objects.only('pk'), pk=self.kwargs['pk'])
+        return super().get_queryset().filter(post=post)
+
+
+class CommentDetail(
+    ConditionalDetailMixin, AnonymousResponseCacheMixin, SparseFieldsetMixin,
+    generics.RetrieveUpdateDestroyAPIView
+):
+    cache_models = COMMENT_CACHE_MODELS
+    # created_at/updated_at default to "3 minutes ago" (drf_api/timestamps.py)
+    natural_timestamps = True
+    # ETag / If-Match, see drf_api/conditional.py
+    validator_fields = (
+        'created_at', 'updated_at', 'owner__username', 'owner__profile__image',
+        'post__title', 'post__owner__username',
+    )
+    queryset = Comment.objects.select_related('owner__profile', 'post__owner')
     permission_classes = [IsOwnerOrReadOnly]
     serializer_class = CommentDetailSerializer
 
+    # The timestamps as rendered: humanized ones ('2 minutes ago', the
+    # default) change with time alone, once a minute
+    def get_validator_extra(self, values):
+        mode = get_mode(self.request)
+        return (
+            format_timestamp(values['created_at'], mode),
+            format_timestamp(values['updated_at'], mode),
+        )
+
+
 # By having two serializers:
 # CommentSerializer can be used for creating comments where the post field is writable.
 # CommentDetailSerializer can be used for editing comments where the post field is read-only.
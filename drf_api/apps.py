@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class DrfApiConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'drf_api'
+
+    def ready(self):
+        # Registers the query plan check
+        from . import checks  # noqa: F401
@@ -0,0 +1,152 @@
+"""
+Plain SQL INSERT helpers for loading data (generate_data, import_users,
+feeds) and for idempotent single-row writes (likes, follows).
+
+bulk_create() builds a model instance per row and then runs every value of
+every instance through its field's get_db_prep_save(); on millions of rows
+that costs more than the database does. insert_rows() takes plain tuples and
+writes multi-row INSERT statements directly. It sends no signals and doesn't
+return the new primary keys.
+"""
+from itertools import islice
+
+from django.db import connection, models
+from django.utils import timezone
+
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` items from any iterable, lazily."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class InsertStatement:
+    """
+    INSERT INTO the model's table, with a value for each of the given field
+    names per row. The model's other fields get their default (or the
+    current time for auto_now fields). Only datetimes are converted, so the
+    other values must already be what the database expects (e.g. ids for
+    foreign keys). With ignore_conflicts, rows that break a unique
+    constraint are skipped.
+    """
+    def __init__(self, model, fields, ignore_conflicts=False):
+        opts = model._meta
+        given = [opts.get_field(name) for name in fields]
+        now = timezone.now()
+        defaults = []
+        for field in opts.concrete_fields:
+            if field in given or field.primary_key:
+                continue
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                value = now
+            else:
+                value = field.get_default()
+            defaults.append((field, field.get_db_prep_save(value, connection)))
+        self.fields = given + [field for field, value in defaults]
+        self.defaults = tuple(value for field, value in defaults)
+        self.adapters = [
+            connection.ops.adapt_datetimefield_value
+            if isinstance(field, models.DateTimeField) else None
+            for field in given
+        ]
+
+        self.row_sql = '(' + ', '.join(['%s'] * len(self.fields)) + ')'
+        self.sql_start = '{} {} ({}) VALUES '.format(
+            connection.ops.insert_statement(ignore_conflicts=ignore_conflicts),
+            connection.ops.quote_name(opts.db_table),
+            ', '.join(connection.ops.quote_name(field.column) for field in self.fields),
+        )
+        self.sql_end = ' ' + connection.ops.ignore_conflicts_suffix_sql(
+            ignore_conflicts=ignore_conflicts
+        )
+
+    def as_sql(self, rows):
+        params = []
+        for row in rows:
+            params.extend(
+                adapt(value) if adapt and value is not None else value
+                for adapt, value in zip(self.adapters, row)
+            )
+            params.extend(self.defaults)
+        sql = self.sql_start + ', '.join([self.row_sql] * len(rows)) + self.sql_end
+        return sql, params
+
+
+def insert_rows(model, fields, rows, batch_size=500, ignore_conflicts=False):
+    """
+    INSERT the rows, tuples of values for the given field names, with
+    multi-row statements (see InsertStatement). Return the number of rows
+    sent.
+    """
+    statement = InsertStatement(model, fields, ignore_conflicts)
+    max_params = connection.features.max_query_params
+    if max_params:
+        batch_size = max(1, min(batch_size, max_params // len(statement.fields)))
+
+    sent = 0
+    with connection.cursor() as cursor:
+        for batch in chunked(rows, batch_size):
+            cursor.execute(*statement.as_sql(batch))
+            sent += len(batch)
+    return sent
+
+
+def insert_or_ignore(model, **values):
+    """
+    INSERT one row unless it breaks a unique constraint, without the
+    IntegrityError (and, on Postgres, the rolled back statement) that a
+    save() would cost. Return the new primary key, or None if a conflicting
+    row already exists. Sends no signals.
+    """
+    statement = InsertStatement(model, values, ignore_conflicts=True)
+    sql, params = statement.as_sql([tuple(values.values())])
+    with connection.cursor() as cursor:
+        if connection.features.can_return_columns_from_insert:
+            # INSERT ... ON CONFLICT DO NOTHING RETURNING id
+            returning, returning_params = connection.ops.return_insert_columns(
+                [model._meta.pk]
+            )
+            cursor.execute(f'{sql} {returning}', params + list(returning_params))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        # INSERT OR IGNORE: nothing was inserted if no row changed
+        cursor.execute(sql, params)
+        return cursor.lastrowid if cursor.rowcount == 1 else None
+
+
+def delete_pks(model, pks, batch_size=500):
+    """
+    DELETE the rows with these primary keys, without loading them or sending
+    signals. Return the number of rows deleted.
+    """
+    sql = 'DELETE FROM {} WHERE {} IN '.format(
+        connection.ops.quote_name(model._meta.db_table),
+        connection.ops.quote_name(model._meta.pk.column),
+    )
+    deleted = 0
+    with connection.cursor() as cursor:
+        for batch in chunked(pks, batch_size):
+            cursor.execute(sql + '(' + ', '.join(['%s'] * len(batch)) + ')', batch)
+            deleted += cursor.rowcount
+    return deleted
+
+
+def delete_by_pk(model, pk):
+    """
+    DELETE the row, without loading it or sending signals. Return True if
+    this statement deleted it, False if it was already gone, so that out of
+    concurrent deletes of the same row only one reports it.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {} WHERE {} = %s'.format(
+                connection.ops.quote_name(model._meta.db_table),
+                connection.ops.quote_name(model._meta.pk.column),
+            ),
+            [pk],
+        )
+        return cursor.rowcount == 1
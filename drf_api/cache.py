@@ -0,0 +1,109 @@
+"""
+Versioned response cache for anonymous reads.
+
+Every model has a generation counter in the cache, bumped by the
+post_save/post_delete receivers connected in the apps' models.py. A cached
+response is keyed on the request host and path, its query parameters and the
+generations of the models the view declares in `cache_models`, so any write
+to one of those models makes the old entries unreachable; nothing has to be
+deleted explicitly and stale entries just expire.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from . import timestamps
+
+STATS_KEYS = {'hits': 'response-cache:hits', 'misses': 'response-cache:misses'}
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def generation_key(label):
+    return f'response-cache:generation:{label}'
+
+
+def incr(key, initial):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key is missing (never set, or evicted)
+        if cache.add(key, initial, timeout=None):
+            return initial
+        return cache.incr(key)
+
+
+def bump_generation(sender, **kwargs):
+    # A counter that goes missing restarts from the current time in ms rather
+    # than from 1, so it can't come back to a value an older cache entry
+    # was keyed with.
+    incr(generation_key(sender._meta.label), int(time.time() * 1000))
+
+
+def record(outcome):
+    incr(STATS_KEYS[outcome], 1)
+
+
+def get_stats():
+    values = get_cache().get_many(STATS_KEYS.values())
+    stats = {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+    total = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / total, 4) if total else None
+    return stats
+
+
+def response_cache_key(request, model_labels, extra=()):
+    keys = [generation_key(label) for label in model_labels]
+    generations = get_cache().get_many(keys)
+    # The host too: the bodies carry absolute URLs (next/previous, images)
+    parts = [request.get_host(), request.path] + [
+        f'{name}={value}'
+        for name, values in sorted(request.query_params.lists())
+        for value in values
+    ] + [f'{key}={generations.get(key, 0)}' for key in keys] + list(extra)
+    digest = hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+    return f'response-cache:{digest}'
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Serve GET requests of anonymous users from the cache.
+    `cache_models` lists the labels of every model the response is built
+    from, including the ones only used for filtering. Views whose responses
+    humanize timestamps set `natural_timestamps`: "3 minutes ago" goes stale
+    without any write, so those responses are only reused within a minute.
+    """
+    cache_models = ()
+    natural_timestamps = False
+
+    def get_cache_key(self, request):
+        extra = ()
+        if self.natural_timestamps and timestamps.get_mode(request) == timestamps.NATURAL:
+            extra = (f'minute={timestamps.minute_bucket()}',)
+        return response_cache_key(request, self.cache_models, extra)
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated or not settings.RESPONSE_CACHE_TIMEOUT:
+            return super().get(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record('hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        record('misses')
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,120 @@
+"""
+System check that every list/detail view loads, with select_related() or
+prefetch_related(), the relations its serializer reads for each row.
+
+A serializer reads a relation through a dotted `source`
+(e.g. 'owner.profile.image.url' reads owner and owner.profile) or inside a
+SerializerMethodField; the latter are declared on the serializer class as
+`related_sources`. A relation that the view's queryset doesn't load costs
+one query per serialized object.
+"""
+from django.core import checks
+from django.core.exceptions import FieldDoesNotExist
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.generics import GenericAPIView
+from rest_framework.serializers import ListSerializer
+
+
+def iter_views(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view_class = getattr(pattern.callback, 'cls', None)
+            if view_class is not None:
+                yield view_class
+
+
+def relation_path(model, source):
+    """
+    Return the relations walked by a dotted source, as a lookup
+    ('owner__profile' for 'owner.profile.image.url' on Post), or None if
+    the source doesn't leave the model.
+    """
+    path = []
+    for attr in source.split('.'):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if not path:
+                raise
+            break
+        if not field.is_relation:
+            break
+        path.append(attr)
+        model = field.related_model
+    return '__'.join(path) or None
+
+
+def loaded_relations(queryset):
+    """Return the lookups loaded by the queryset, with all their prefixes."""
+    loaded = set()
+
+    def walk(tree, prefix):
+        for name, subtree in tree.items():
+            loaded.add(prefix + name)
+            walk(subtree, prefix + name + '__')
+
+    if isinstance(queryset.query.select_related, dict):
+        walk(queryset.query.select_related, '')
+    for lookup in queryset._prefetch_related_lookups:
+        lookup = getattr(lookup, 'prefetch_through', lookup)
+        parts = lookup.split('__')
+        loaded.update('__'.join(parts[:i]) for i in range(1, len(parts) + 1))
+    return loaded
+
+
+def serializer_sources(serializer_class):
+    serializer = serializer_class()
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    for name, field in serializer.fields.items():
+        if '.' in field.source:
+            yield name, field.source
+    for source in getattr(serializer_class, 'related_sources', ()):
+        yield source.split('.')[0], source
+
+
+@checks.register()
+def check_query_plans(app_configs, **kwargs):
+    errors = []
+    view_classes = sorted(
+        set(iter_views(get_resolver().url_patterns)),
+        key=lambda view_class: (view_class.__module__, view_class.__name__),
+    )
+    for view_class in view_classes:
+        if not issubclass(view_class, GenericAPIView):
+            continue
+        queryset = getattr(view_class, 'queryset', None)
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        if queryset is None or serializer_class is None:
+            continue
+        # select_related=True loads every forward relation
+        if queryset.query.select_related is True:
+            continue
+        loaded = loaded_relations(queryset)
+        missing = {}
+        for name, source in serializer_sources(serializer_class):
+            try:
+                path = relation_path(queryset.model, source)
+            except FieldDoesNotExist:
+                errors.append(checks.Error(
+                    f"{serializer_class.__name__}.{name} reads "
+                    f"'{source}', which isn't a field of "
+                    f"{queryset.model.__name__}.",
+                    obj=view_class,
+                    id='drf_api.E002',
+                ))
+                continue
+            if path and path not in loaded:
+                missing.setdefault(path, []).append(name)
+        for path, names in missing.items():
+            errors.append(checks.Error(
+                f"{view_class.__name__}.queryset doesn't load '{path}', "
+                f"which {serializer_class.__name__} reads for every object "
+                f"({', '.join(names)}).",
+                hint=f"Add select_related('{path}') to the queryset.",
+                obj=view_class,
+                id='drf_api.E001',
+            ))
+    return errors
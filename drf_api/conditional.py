@@ -0,0 +1,122 @@
+"""
+Conditional requests for detail views.
+
+The ETag of an object is a hash of a few cheap columns (updated_at, the
+denormalized counters, the usernames and images shown in the response...)
+fetched with one values() query, so a GET with a matching If-None-Match is
+answered with 304 Not Modified without loading the object or running the
+serializer, and a PUT/PATCH whose If-Match doesn't match the current ETag is
+rejected with 412 Precondition Failed instead of overwriting someone else's
+changes. The If-Match check and the write run in one transaction with the
+row locked, so two clients holding the same ETag can't both pass it.
+
+Last-Modified is sent from updated_at for information only: counters and
+related objects change without touching updated_at, so If-Modified-Since is
+not used to answer 304s.
+"""
+import hashlib
+import json
+
+from django.db import transaction
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+class ConditionalDetailMixin:
+    # Columns (or lookups across relations) whose values change whenever the
+    # serialized object does
+    validator_fields = ('updated_at',)
+    # Annotations of get_queryset() that only exist for authenticated users
+    # (e.g. like_id) and must be part of the ETag
+    user_validator_fields = ()
+
+    def get_validator_fields(self):
+        fields = list(self.validator_fields)
+        if self.request.user.is_authenticated:
+            fields += self.user_validator_fields
+        return fields
+
+    def get_validator_extra(self, values):
+        # Hook for response content that doesn't come from the database
+        return ()
+
+    def get_validator(self):
+        """
+        Return the (etag, last_modified) of the requested object,
+        or None if it doesn't exist.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset()
+        # User annotations the response leaves out (?fields=/?omit=, see
+        # drf_api/fieldsets.py) aren't in the queryset
+        fields = [
+            field for field in self.get_validator_fields()
+            if field not in self.user_validator_fields
+            or field in queryset.query.annotations
+        ]
+        values = queryset.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values(*fields).first()
+        if values is None:
+            return None
+        # The representation also depends on who asks (is_owner) and how
+        # it's rendered
+        payload = json.dumps([
+            sorted(values.items()),
+            self.request.user.pk,
+            self.request.accepted_media_type,
+            list(self.get_validator_extra(values)),
+        ], default=str)
+        etag = quote_etag(hashlib.sha1(payload.encode()).hexdigest())
+        updated_at = values.get('updated_at')
+        last_modified = int(updated_at.timestamp()) if updated_at else None
+        return etag, last_modified
+
+    def set_validator_headers(self, response, validator):
+        etag, last_modified = validator
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        validator = self.get_validator()
+        if validator is None:
+            return super().get(request, *args, **kwargs)
+        not_modified = get_conditional_response(request, etag=validator[0])
+        if not_modified is not None:
+            return self.set_validator_headers(not_modified, validator)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.set_validator_headers(response, validator)
+        return response
+
+    def lock_object(self, instance):
+        # Only the object's own row: FOR UPDATE can't lock the nullable side
+        # of the select_related() outer joins
+        list(type(instance)._default_manager.select_for_update().filter(
+            pk=instance.pk
+        ).values_list('pk', flat=True))
+
+    def conditional_update(self, handler, request, *args, **kwargs):
+        with transaction.atomic():
+            # Check the object permissions first, so that a 412 doesn't tell
+            # a user who may not edit the object anything about it
+            instance = self.get_object()
+            # A concurrent update with the same ETag waits here until this
+            # one commits, then reads the new ETag and fails with a 412
+            self.lock_object(instance)
+            validator = self.get_validator()
+            failed = get_conditional_response(request, etag=validator[0])
+            if failed is not None:
+                return failed
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                self.set_validator_headers(response, self.get_validator())
+        return response
+
+    def put(self, request, *args, **kwargs):
+        return self.conditional_update(super().put, request, *args, **kwargs)
+
+    def patch(self, request, *args, **kwargs):
+        return self.conditional_update(super().patch, request, *args, **kwargs)
@@ -0,0 +1,191 @@
+"""
+Fast read-only serializers for list responses (settings.FAST_LIST_SERIALIZERS).
+
+A ModelSerializer builds a page by instantiating the model rows (and their
+select_related() rows), then, per row and per field, walking the field's
+source through the related instances and calling its to_representation().
+A FastSerializer mirrors the output of one ModelSerializer from the plain
+dicts of a values() query instead: it declares, per output field, the
+lookups it needs and how to turn them into the value; these are compiled
+once per response into a list of getters, and each row is one dict
+comprehension over them.
+
+drf_api/tests.py compares the output of every list view with both
+serializers; `python manage.py check_fast_serializers` times them.
+"""
+from operator import itemgetter
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from . import media
+from .fieldsets import get_fieldset
+from .pagination import OptionalCursorPagination
+from .timestamps import format_timestamp, get_mode
+
+
+class Value:
+    """
+    An output field computed from `lookups` of the values() row: the first
+    column as it is, e.g. an id, a count or a username. The subclasses below
+    render their columns otherwise.
+    """
+    def __init__(self, *lookups):
+        self.lookups = lookups
+
+    def bind(self, serializer):
+        """Return a function of the row that returns the field's value."""
+        return itemgetter(self.lookups[0])
+
+
+class DateTime(Value):
+    # As a ModelSerializer renders a DateTimeField (settings.REST_FRAMEWORK's
+    # DATETIME_FORMAT in the current time zone)
+    def bind(self, serializer):
+        lookup = self.lookups[0]
+        to_representation = serializers.DateTimeField().to_representation
+
+        def get(row):
+            value = row[lookup]
+            return None if value is None else to_representation(value)
+        return get
+
+
+class Timestamp(Value):
+    # As TimestampField renders it (?timestamps=, drf_api/timestamps.py)
+    def bind(self, serializer):
+        lookup = self.lookups[0]
+        mode, now = serializer.timestamp_mode, serializer.now
+        return lambda row: format_timestamp(row[lookup], mode, now)
+
+
+class ImageURL(Value):
+    """
+    The URL of the file named by the column, memoized (drf_api/media.py).
+    With absolute=True, as an ImageField of a ModelSerializer renders it
+    (an absolute URL, None for no file); otherwise as
+    ReadOnlyField(source='...image.url') does.
+    """
+    def __init__(self, lookup, model, field_name, absolute=False):
+        super().__init__(lookup)
+        self.storage = model._meta.get_field(field_name).storage
+        self.absolute = absolute
+
+    def bind(self, serializer):
+        lookup = self.lookups[0]
+        storage = self.storage
+        request = serializer.request if self.absolute else None
+        if request is None:
+            return lambda row: media.url(storage, row[lookup])
+
+        def get(row):
+            name = row[lookup]
+            if not name:
+                return None
+            return request.build_absolute_uri(media.url(storage, name))
+        return get
+
+
+class IsOwner(Value):
+    # request.user == obj.owner
+    def bind(self, serializer):
+        lookup = self.lookups[0]
+        user = serializer.request.user
+        if not user.is_authenticated:
+            return lambda row: False
+        return lambda row: row[lookup] == user.pk
+
+
+class Annotation(Value):
+    # An annotation of the view's queryset that only some requests have,
+    # e.g. like_id for authenticated users; None when missing
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def bind(self, serializer):
+        name = self.name
+        return lambda row: row.get(name)
+
+
+class Method(Value):
+    # function(row), e.g. to nest a few columns in a dict
+    def __init__(self, function, *lookups):
+        super().__init__(*lookups)
+        self.function = function
+
+    def bind(self, serializer):
+        return self.function
+
+
+class FastSerializer:
+    """
+    Read-only, list-only counterpart of `serializer_class`, built from
+    values() rows. `fields` maps every output field of serializer_class, in
+    the same order, to a Value. Only the columns of the fields asked for
+    with ?fields=/?omit= (drf_api/fieldsets.py) are selected and rendered.
+    """
+    serializer_class = None
+    fields = {}
+
+    def __init__(self, context):
+        self.context = context
+        self.request = context.get('request')
+        self.timestamp_mode = get_mode(self.request)
+        self.now = timezone.now()
+        fieldset = get_fieldset(self.request, list(self.fields))
+        self.columns = self.fields if fieldset is None else {
+            name: self.fields[name] for name in fieldset
+        }
+
+    def values(self, queryset, *extra):
+        # `extra`: lookups the view reads from the rows, e.g. for pagination
+        lookups = {
+            lookup for column in self.columns.values() for lookup in column.lookups
+        }
+        lookups.update(extra)
+        # Annotations are kept: serialized ones (like_id...) and the ones the
+        # ordering or the cursor pagination read (trending, search_rank...)
+        lookups.update(queryset.query.annotations)
+        return queryset.values(*lookups)
+
+    def to_representation(self, rows):
+        getters = [(name, column.bind(self)) for name, column in self.columns.items()]
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+
+class FastListMixin:
+    """
+    List with `fast_serializer_class` (a FastSerializer) rather than the
+    view's serializer_class when settings.FAST_LIST_SERIALIZERS is on.
+    """
+    fast_serializer_class = None
+
+    def use_fast_serializer(self):
+        return self.fast_serializer_class is not None and settings.FAST_LIST_SERIALIZERS
+
+    def get_keyset_lookups(self, queryset):
+        # A cursor pagination reads the position of the last row from its
+        # ordering columns, which ?fields= may leave out
+        paginator = self.paginator
+        if isinstance(paginator, OptionalCursorPagination):
+            if not paginator.use_cursor(self.request):
+                return ()
+            paginator = paginator.cursor_pagination_class()
+        if not hasattr(paginator, 'get_ordering'):
+            return ()
+        ordering = paginator.get_ordering(self.request, queryset, self)
+        return [field.lstrip('-') for field in ordering]
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_serializer():
+            return super().list(request, *args, **kwargs)
+        serializer = self.fast_serializer_class(context=self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = serializer.values(queryset, *self.get_keyset_lookups(queryset))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(queryset))
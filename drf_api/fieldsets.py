@@ -0,0 +1,132 @@
+"""
+Sparse fieldsets: GET ?fields=id,title,image returns only those fields,
+and ?omit=content leaves fields out, in the serializer's field order.
+
+What isn't rendered isn't computed either:
+
+- SparseFieldsetSerializerMixin drops the fields from the serializer, so
+  their SerializerMethodFields aren't called;
+- SparseFieldsetMixin (views) drops the select_related() joins that only
+  the left out fields read, and views skip the annotations of left out
+  fields (see wants_field(), e.g. LikeIdMixin in posts/views.py);
+- a FastSerializer (drf_api/fast.py) only selects the columns of the
+  requested fields.
+
+Unknown field names are a 400. Fieldsets only apply to the top-level
+serializer of GET/HEAD responses: writes validate every field.
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .checks import loaded_relations, relation_path
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def parse(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def get_fieldset(request, field_names):
+    """
+    Return the names of the requested fields among `field_names` (in their
+    order), or None when the request asks for all of them.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = parse(request.query_params.get(FIELDS_PARAM, ''))
+    omit = parse(request.query_params.get(OMIT_PARAM, ''))
+    if not fields and not omit:
+        return None
+    unknown = [name for name in fields + omit if name not in field_names]
+    if unknown:
+        param = FIELDS_PARAM if unknown[0] in fields else OMIT_PARAM
+        raise serializers.ValidationError({
+            param: [f"Unknown field(s): {', '.join(unknown)}."]
+        })
+    return [
+        name for name in field_names
+        if (not fields or name in fields) and name not in omit
+    ]
+
+
+class SparseFieldsetSerializerMixin:
+    """Serializer that renders only the fields asked for with ?fields=/?omit=."""
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        # Not the serializers nested in this one
+        if parent is not None:
+            return fields
+        fieldset = get_fieldset(self.context.get('request'), list(fields))
+        if fieldset is None:
+            return fields
+        return {name: fields[name] for name in fieldset}
+
+
+# serializer class -> (field names, {field name: relations it reads})
+_field_relations = {}
+
+
+def get_field_relations(serializer_class, model):
+    """
+    Return the field names of serializer_class and, per field, the
+    select_related() lookups it needs, as drf_api/checks.py reads them:
+    dotted sources, and `related_sources` for the method fields.
+    """
+    if serializer_class not in _field_relations:
+        fields = serializer_class().fields
+        method_relations = {
+            relation_path(model, source)
+            for source in getattr(serializer_class, 'related_sources', ())
+        }
+        relations = {}
+        for name, field in fields.items():
+            if isinstance(field, serializers.SerializerMethodField):
+                relations[name] = method_relations
+            elif '.' in field.source:
+                relations[name] = {relation_path(model, field.source)}
+            else:
+                relations[name] = set()
+        _field_relations[serializer_class] = (list(fields), relations)
+    return _field_relations[serializer_class]
+
+
+class SparseFieldsetMixin:
+    """
+    View whose queryset only loads what the fields asked for with
+    ?fields=/?omit= need. Its serializer uses SparseFieldsetSerializerMixin.
+    """
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            field_names, _ = get_field_relations(
+                self.get_serializer_class(), self.queryset.model
+            )
+            self._fieldset = get_fieldset(self.request, field_names)
+        return self._fieldset
+
+    def wants_field(self, name):
+        fieldset = self.get_fieldset()
+        return fieldset is None or name in fieldset
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fieldset = self.get_fieldset()
+        if fieldset is None or not isinstance(queryset.query.select_related, dict):
+            return queryset
+        _, relations = get_field_relations(
+            self.get_serializer_class(), queryset.model
+        )
+        loaded = loaded_relations(queryset)
+        lookups = set().union(*(relations[name] for name in fieldset)) & loaded
+        # Lookups that are prefixes of others are loaded with them
+        lookups = [
+            lookup for lookup in lookups
+            if not any(other.startswith(lookup + '__') for other in lookups)
+        ]
+        queryset = queryset.select_related(None)
+        # select_related() without lookups would load every relation
+        return queryset.select_related(*sorted(lookups)) if lookups else queryset
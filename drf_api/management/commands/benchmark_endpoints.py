@@ -0,0 +1,272 @@
+import json
+import logging
+import random
+import statistics
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.test import APIClient
+
+from comments.models import Comment
+from followers.models import Follower
+from likes.models import Like
+from posts.models import Post
+from profiles.models import Profile
+
+BUDGETS_FILE = Path(__file__).resolve().parents[2] / 'benchmark_budgets.json'
+
+# URL prefixes of third-party apps, of admin-only endpoints and of the
+# uploads served with LOCAL_MEDIA=1 (a regex route)
+SKIPPED_PREFIXES = (
+    'admin/', 'api-auth/', 'dj-rest-auth/', 'cache-stats/', 'follow-graph-stats/',
+    '^media/',
+)
+
+# The object used for <int:pk> in each resource's URLs: the busiest one, so
+# that the per-row costs show up
+SAMPLE_OBJECTS = {
+    'posts': lambda: Post.objects.order_by('-likes_count', 'pk'),
+    'profiles': lambda: Profile.objects.order_by('-followers_count', 'pk'),
+    'comments': lambda: Comment.objects.order_by('pk'),
+    'likes': lambda: Like.objects.order_by('pk'),
+    'followers': lambda: Follower.objects.order_by('pk'),
+}
+
+# Routes only the owner of the object may read: the authenticated user's
+# own object is used instead
+OWN_OBJECTS = {
+    'profiles/<int:pk>/suggestions/': lambda user: user.profile,
+}
+
+
+def iter_routes(patterns, prefix=''):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern):
+            yield route, pattern.callback
+
+
+def allows_get(callback):
+    view_class = getattr(callback, 'cls', None)
+    if view_class is None:
+        return True
+    return hasattr(view_class, 'get')
+
+
+class QueryCounter:
+    # Counts through an execute wrapper rather than connection.queries,
+    # which only records with DEBUG on and is capped in length
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    index = min(len(samples) - 1, round(fraction * (len(samples) - 1)))
+    return samples[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database, request every GET endpoint of the API '
+        'as an anonymous and as an authenticated user, and record the number '
+        'of queries, the p50/p95 latency and the response size of each. Fails '
+        'when an endpoint goes over its budget in drf_api/benchmark_budgets.json.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=40)
+        parser.add_argument('--posts-per-user', type=int, default=5)
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Timed requests per endpoint and user.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--output', help='Write the JSON results to this file, not stdout.',
+        )
+        parser.add_argument(
+            '--budgets', default=str(BUDGETS_FILE),
+            help='Budget file to check the results against.',
+        )
+        parser.add_argument(
+            '--update-budgets', action='store_true',
+            help='Write the budget file from these results instead of '
+                 'checking them.',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Measure the uncached path: the response cache would hide the
+            # queries of every repeated anonymous request
+            with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+                user = self.seed(options)
+                results = self.run_benchmarks(user, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = json.dumps({
+            'dataset': {
+                'users': options['users'],
+                'posts_per_user': options['posts_per_user'],
+                'seed': options['seed'],
+            },
+            'database': connection.vendor,
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(report + '\n')
+        else:
+            self.stdout.write(report)
+
+        if options['update_budgets']:
+            self.write_budgets(results, options['budgets'])
+        else:
+            self.check_budgets(results, options['budgets'])
+
+    def seed(self, options):
+        """
+        Create a dataset through the models' normal save path, so that the
+        signal receivers fill the counters, feeds and search index. The
+        suggestions are computed in batch, as in production.
+        """
+        rng = random.Random(options['seed'])
+        users = [
+            User.objects.create(username=f'user{i}')
+            for i in range(options['users'])
+        ]
+        posts = [
+            Post.objects.create(
+                owner=owner, title=f'Post {i} by {owner.username}',
+                content='Lorem ipsum dolor sit amet',
+            )
+            for owner in users
+            for i in range(options['posts_per_user'])
+        ]
+        for owner in users:
+            for followed in rng.sample(users, k=max(1, len(users) // 4)):
+                if followed != owner:
+                    Follower.objects.create(owner=owner, followed=followed)
+            for post in rng.sample(posts, k=max(1, len(posts) // 10)):
+                Like.objects.create(owner=owner, post=post)
+            for post in rng.sample(posts, k=max(1, len(posts) // 20)):
+                Comment.objects.create(owner=owner, post=post, content='Nice!')
+        call_command('refresh_suggestions', stdout=StringIO())
+        return users[0]
+
+    def get_paths(self, user):
+        """(route, path) of every GET endpoint, on the sample objects."""
+        paths = []
+        for route, callback in iter_routes(get_resolver().url_patterns):
+            if route.startswith(SKIPPED_PREFIXES) or not allows_get(callback):
+                continue
+            path = route
+            if '<int:pk>' in route:
+                if route in OWN_OBJECTS:
+                    sample = OWN_OBJECTS[route](user)
+                else:
+                    sample = SAMPLE_OBJECTS[route.split('/')[0]]().first()
+                path = route.replace('<int:pk>', str(sample.pk))
+            paths.append(('/' + route, '/' + path))
+        return paths
+
+    def run_benchmarks(self, user, repeat):
+        anonymous = APIClient()
+        authenticated = APIClient()
+        authenticated.force_authenticate(user)
+        # The anonymous requests to the endpoints that need a user are
+        # answered 403 as expected, each of which django.request logs
+        request_logger = logging.getLogger('django.request')
+        request_level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            return self.request_paths(user, anonymous, authenticated, repeat)
+        finally:
+            request_logger.setLevel(request_level)
+
+    def request_paths(self, user, anonymous, authenticated, repeat):
+        results = []
+        for route, path in self.get_paths(user):
+            for name, client in [
+                ('anonymous', anonymous), ('authenticated', authenticated)
+            ]:
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    response = client.get(path)
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    client.get(path)
+                    timings.append((time.perf_counter() - start) * 1000)
+                # Keyed by route, so that the budgets don't depend on the
+                # pks of the sample objects
+                results.append({
+                    'endpoint': f'GET {route}',
+                    'path': path,
+                    'user': name,
+                    'status': response.status_code,
+                    'queries': queries.count,
+                    'p50_ms': round(statistics.median(timings), 2),
+                    'p95_ms': round(percentile(timings, 0.95), 2),
+                    'bytes': len(response.content),
+                })
+        return results
+
+    @staticmethod
+    def budget_key(result):
+        return f"{result['endpoint']} as {result['user']}"
+
+    def write_budgets(self, results, path):
+        # Query counts are exact; latency gets generous headroom because it
+        # depends on the machine
+        budgets = {
+            self.budget_key(result): {
+                'queries': result['queries'],
+                'p95_ms': max(50, round(result['p95_ms'] * 5)),
+            }
+            for result in results
+        }
+        Path(path).write_text(json.dumps(budgets, indent=2, sort_keys=True) + '\n')
+        self.stderr.write(f'Wrote {len(budgets)} budgets to {path}')
+
+    def check_budgets(self, results, path):
+        budgets = json.loads(Path(path).read_text())
+        failures = []
+        for result in results:
+            budget = budgets.get(self.budget_key(result))
+            if budget is None:
+                failures.append(f'{self.budget_key(result)}: no budget')
+                continue
+            for metric in ('queries', 'p95_ms'):
+                if result[metric] > budget[metric]:
+                    failures.append(
+                        f'{self.budget_key(result)}: {metric} '
+                        f'{result[metric]} > {budget[metric]}'
+                    )
+        if failures:
+            raise CommandError(
+                'Endpoints over budget:\n' + '\n'.join(failures)
+            )
+        self.stderr.write(self.style.SUCCESS(
+            f'All {len(results)} measurements are within budget'
+        ))
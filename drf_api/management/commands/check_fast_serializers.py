@@ -0,0 +1,87 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import get_resolver
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from drf_api.management.commands.benchmark_endpoints import SAMPLE_OBJECTS, iter_routes
+
+
+def iter_list_views():
+    """
+    (path, view class, URL kwargs) of every list view with a fast
+    serializer, on the SAMPLE_OBJECTS of the database. drf_api/tests.py
+    checks that both serializers render the same responses.
+    """
+    for route, callback in iter_routes(get_resolver().url_patterns):
+        view_class = getattr(callback, 'cls', None)
+        if getattr(view_class, 'fast_serializer_class', None) is None:
+            continue
+        kwargs = {}
+        if '<int:pk>' in route:
+            kwargs['pk'] = SAMPLE_OBJECTS[route.split('/')[0]]().first().pk
+            route = route.replace('<int:pk>', str(kwargs['pk']))
+        yield '/' + route, view_class, kwargs
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the fast serializer (drf_api/fast.py) and the ModelSerializer '
+        'of every list view on a page. Reads the configured database, e.g. '
+        'after generate_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, default=10,
+            help='Rows serialized per timed page.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Times each page is serialized for the timings.',
+        )
+
+    def handle(self, *args, **options):
+        # The most active user, so that like_id, following_id and is_owner
+        # are set on some rows
+        user = User.objects.filter(profile__isnull=False).order_by(
+            '-profile__following_count', 'pk'
+        ).first()
+        if user is None:
+            raise CommandError('The database is empty, run generate_data first.')
+
+        for path, view_class, kwargs in iter_list_views():
+            self.time_serializers(path, view_class, kwargs, user, options)
+
+    def time_serializers(self, path, view_class, kwargs, user, options):
+        django_request = APIRequestFactory().get(path)
+        force_authenticate(django_request, user)
+        view = view_class()
+        view.setup(django_request, **kwargs)
+        request = view.initialize_request(django_request, **kwargs)
+        view.request = request
+        view.format_kwarg = None
+        view.initial(request)
+        queryset = view.filter_queryset(view.get_queryset())
+        context = view.get_serializer_context()
+
+        # Only the serialization is timed: the rows are fetched beforehand
+        instances = list(queryset[:options['page_size']])
+        fast = view.fast_serializer_class(context=context)
+        rows = list(fast.values(queryset)[:options['page_size']])
+
+        started = time.perf_counter()
+        for _ in range(options['repeat']):
+            view.get_serializer(instances, many=True).data
+        serializer_ms = (time.perf_counter() - started) * 1000 / options['repeat']
+        started = time.perf_counter()
+        for _ in range(options['repeat']):
+            view.fast_serializer_class(context=context).to_representation(rows)
+        fast_ms = (time.perf_counter() - started) * 1000 / options['repeat']
+
+        self.stdout.write(
+            f'{path}: {serializer_ms:.3f}ms with {view.serializer_class.__name__}, '
+            f'{fast_ms:.3f}ms with {view.fast_serializer_class.__name__} '
+            f'({serializer_ms / fast_ms:.1f}x) per page of {len(rows)}'
+        )
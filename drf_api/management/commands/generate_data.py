@@ -0,0 +1,248 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from comments.models import Comment
+from drf_api.bulk import chunked, insert_rows
+from drf_api.cache import bump_generation
+from followers.models import Follower
+from likes.models import Like
+from posts.models import Post
+from profiles.bulk import bulk_create_users
+from profiles.models import Profile
+
+WORDS = (
+    'sunset mountain river forest city street coffee morning night ocean '
+    'beach winter summer autumn spring garden flower portrait travel food '
+    'friends family music concert festival market bridge tower museum art '
+    'painting sketch photo light shadow colour blue green golden quiet '
+    'busy old new first last long short walk run ride climb swim dream'
+).split()
+
+
+def zipf_weights(n, exponent):
+    # Cumulative weights of a Zipf distribution over n ranks, for
+    # random.choices(cum_weights=...)
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(n)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic users, profiles, posts, comments, '
+        'likes and follows for load testing. Followers follow a power-law '
+        'distribution, so a few accounts have most of them. Rows are inserted '
+        'with multi-row INSERTs, without signals; the counters, feeds, search '
+        'index, trending scores and suggestions are rebuilt at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--posts', type=float, default=5,
+            help='Average number of posts per user.',
+        )
+        parser.add_argument(
+            '--follows', type=float, default=20,
+            help='Average number of accounts each user follows.',
+        )
+        parser.add_argument(
+            '--likes', type=float, default=10,
+            help='Average number of likes per post.',
+        )
+        parser.add_argument(
+            '--comments', type=float, default=2,
+            help='Average number of comments per post.',
+        )
+        parser.add_argument(
+            '--exponent', type=float, default=1.1,
+            help='Zipf exponent of the follower and like distributions.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Spread the creation dates over this many days.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help="Don't recount the counters or rebuild the feeds and the "
+                 'search index.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.start = self.now - timedelta(days=options['days'])
+        if connection.vendor == 'sqlite':
+            # The default 2 MB page cache keeps spilling the indexes to
+            # disk while they're being filled in random order
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA cache_size = -262144')
+
+        user_ids = self.stage('users', self.create_users, options)
+        self.stage('follows', self.create_follows, user_ids, options)
+        post_ids, post_times = self.stage(
+            'posts', self.create_posts, user_ids, options
+        )
+        self.stage('likes', self.create_likes, user_ids, post_ids, post_times, options)
+        self.stage(
+            'comments', self.create_comments, user_ids, post_ids, post_times, options
+        )
+
+        if not options['skip_rebuild']:
+            for command, command_options in (
+                ('recount_profiles', {}), ('recount_posts', {}),
+                ('rebuild_feeds', {}), ('rebuild_post_search_index', {}),
+                ('refresh_trending', {'all': True}),
+                ('refresh_suggestions', {'all': True}),
+            ):
+                self.stage(
+                    command, call_command, command, stdout=self.stdout,
+                    **command_options,
+                )
+        # The bulk inserts don't send the signals that invalidate the cached
+        # responses (drf_api/cache.py)
+        for model in (User, Profile, Post, Comment, Like, Follower):
+            bump_generation(model)
+
+    def stage(self, name, function, *args, **kwargs):
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        # Stages return the new ids, (ids, ...) or a row count
+        if isinstance(result, tuple):
+            rows = len(result[0])
+        elif isinstance(result, list):
+            rows = len(result)
+        else:
+            rows = result if isinstance(result, int) else 0
+        rate = f', {rows / elapsed:,.0f} rows/s' if rows else ''
+        self.stdout.write(f'{name}: {rows:,} rows in {elapsed:.1f}s{rate}')
+        return result
+
+    def random_time(self, after=None):
+        start = after or self.start
+        return start + (self.now - start) * self.rng.random()
+
+    def sentence(self, low, high):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def insert(self, model, fields, rows, ignore_conflicts=False):
+        with transaction.atomic():
+            return insert_rows(
+                model, fields, rows, batch_size=self.batch_size,
+                ignore_conflicts=ignore_conflicts,
+            )
+
+    def create_users(self, options):
+        first = (User.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        # All the users share one unusable password: hashing a real one
+        # per user would take longer than the whole insert
+        password = make_password(None)
+        joined = sorted(self.random_time() for _ in range(options['users']))
+        user_ids = []
+        with transaction.atomic():
+            for batch in chunked(enumerate(joined, first), self.batch_size):
+                ids = bulk_create_users([
+                    {
+                        'username': f'loadtest{number}', 'password': password,
+                        'date_joined': date_joined,
+                    }
+                    for number, date_joined in batch
+                ])
+                user_ids.extend(ids.values())
+        return user_ids
+
+    def create_follows(self, user_ids, options):
+        # Followed accounts are drawn from a Zipf distribution over the users
+        # in random order, which gives a power-law follower count
+        ranked = self.rng.sample(user_ids, len(user_ids))
+        weights = zipf_weights(len(ranked), options['exponent'])
+        rng = self.rng
+
+        def follows():
+            for owner_id in user_ids:
+                count = round(rng.expovariate(1 / options['follows']))
+                # Repeated draws of the same account are merged, so the
+                # most popular accounts don't get more than one follow each
+                followed_ids = set(
+                    rng.choices(ranked, cum_weights=weights, k=count)
+                )
+                followed_ids.discard(owner_id)
+                for followed_id in followed_ids:
+                    yield owner_id, followed_id, self.random_time()
+
+        first = Follower.objects.aggregate(last=Max('pk'))['last'] or 0
+        self.insert(
+            Follower, ('owner', 'followed', 'created_at'), follows(),
+            ignore_conflicts=True,
+        )
+        return Follower.objects.filter(pk__gt=first).count()
+
+    def create_posts(self, user_ids, options):
+        # Posts are inserted oldest first, so that ids grow with created_at
+        # as they do in production
+        count = round(len(user_ids) * options['posts'])
+        post_times = sorted(self.random_time() for _ in range(count))
+        owners = self.rng.choices(user_ids, k=count)
+        image = Post._meta.get_field('image').default
+        first = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        self.insert(Post, (
+            'owner', 'title', 'content', 'image', 'image_filter',
+            'likes_count', 'comments_count', 'created_at', 'updated_at',
+        ), (
+            (
+                owner_id, self.sentence(2, 6).capitalize(),
+                self.sentence(5, 40), image, 'normal', 0, 0,
+                created_at, created_at,
+            )
+            for owner_id, created_at in zip(owners, post_times)
+        ))
+        post_ids = list(Post.objects.filter(pk__gt=first).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
+        # A few posts get most of the likes and comments
+        self.post_ranking = self.rng.sample(range(count), count)
+        self.post_weights = zipf_weights(count, options['exponent'])
+        return post_ids, post_times
+
+    def pick_posts(self, count):
+        return self.rng.choices(
+            self.post_ranking, cum_weights=self.post_weights, k=count
+        )
+
+    def create_likes(self, user_ids, post_ids, post_times, options):
+        first = Like.objects.aggregate(last=Max('pk'))['last'] or 0
+        # A user liking a post twice is dropped by the unique constraint
+        self.insert(Like, ('owner', 'post', 'created_at'), (
+            (
+                self.rng.choice(user_ids), post_ids[index],
+                self.random_time(after=post_times[index]),
+            )
+            for index in self.pick_posts(round(len(post_ids) * options['likes']))
+        ), ignore_conflicts=True)
+        return Like.objects.filter(pk__gt=first).count()
+
+    def create_comments(self, user_ids, post_ids, post_times, options):
+        def comments():
+            count = round(len(post_ids) * options['comments'])
+            for index in self.pick_posts(count):
+                created_at = self.random_time(after=post_times[index])
+                yield (
+                    self.rng.choice(user_ids), post_ids[index],
+                    self.sentence(1, 20), created_at, created_at,
+                )
+
+        return self.insert(Comment, (
+            'owner', 'post', 'content', 'created_at', 'updated_at'
+        ), comments())
@@ -0,0 +1,83 @@
+"""
+Memoized URLs of stored files (profile and post images).
+
+Every serialized post and comment renders its owner's avatar, and the same
+few avatars come back many times per page. Building their URL is pure
+string work, but with MediaCloudinaryStorage it is slow (option parsing,
+regular expressions, signatures). Here URLs are memoized per
+(storage, name) in a bounded LRU of MEDIA_URL_CACHE_SIZE file names.
+
+A file's URL only depends on its name, and a new upload gets a new name,
+so entries never go stale by themselves. Profile and Post still forget
+their image when they are saved or deleted (profiles/models.py,
+posts/models.py), in case a file is replaced under the same name. That
+only clears this worker process's cache.
+
+With LOCAL_MEDIA=1 files are stored on the local filesystem
+(FileSystemStorage under MEDIA_ROOT) rather than on Cloudinary, e.g. to
+run offline.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework import serializers
+
+_lock = threading.Lock()
+# name -> {storage: url}, least recently used first
+_entries = OrderedDict()
+
+
+def url(storage, name):
+    """Return storage.url(name), memoized."""
+    if not name:
+        return None
+    with _lock:
+        urls = _entries.get(name)
+        if urls is not None and storage in urls:
+            _entries.move_to_end(name)
+            return urls[storage]
+    value = storage.url(name)
+    with _lock:
+        _entries.setdefault(name, {})[storage] = value
+        _entries.move_to_end(name)
+        while len(_entries) > settings.MEDIA_URL_CACHE_SIZE:
+            _entries.popitem(last=False)
+    return value
+
+
+def forget(name):
+    """Drop the URLs of a file name, in every storage."""
+    with _lock:
+        _entries.pop(name, None)
+
+
+def forget_image(sender, instance, **kwargs):
+    # post_save/post_delete receiver of the models with an `image` field
+    forget(instance.image.name)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+class MediaURLField(serializers.ReadOnlyField):
+    """
+    The URL of a FieldFile, e.g. source='owner.profile.image', as
+    ReadOnlyField(source='owner.profile.image.url') renders it.
+    """
+    def to_representation(self, value):
+        return url(value.storage, value.name)
+
+
+class MediaImageField(serializers.ImageField):
+    """ImageField that renders its URL memoized, see url()."""
+    def to_representation(self, value):
+        if not value:
+            return None
+        value_url = url(value.storage, value.name)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(value_url)
+        return value_url
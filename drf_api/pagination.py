@@ -0,0 +1,247 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id), newest first.
+    Every model behind a list endpoint has a composite index on these two
+    columns, so each page is an indexed range scan instead of an OFFSET scan,
+    and no COUNT(*) is issued.
+
+    The cursor holds the values of every ordering column of the row the page
+    starts after, so an ordering on a column with ties (likes_count...)
+    continues on the id: DRF's CursorPagination only keeps the first column
+    and skips the tied rows with an OFFSET, which stops being exact past
+    offset_cutoff rows. The ordering columns must not be null.
+    """
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        # A client-chosen ?ordering= (OrderingFilter), or the ordering of
+        # another filter backend with a get_ordering() (e.g. the relevance of
+        # a search, posts/search.py), is honoured as long as it can be turned
+        # into a keyset: lookups across relations can't be, so those fall
+        # back to the default ordering. The id is appended as a tie-breaker
+        # so the ordering is always total and stable.
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    break
+        if not ordering or any('__' in field for field in ordering):
+            return self.ordering
+        ordering = tuple(ordering)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def get_position(self, row):
+        # Model instances, or values() rows (drf_api/fast.py)
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return tuple(row[field] for field in fields)
+        return tuple(getattr(row, field) for field in fields)
+
+    def keyset_filter(self, ordering, position):
+        # The rows after `position` in `ordering`: (a, b) after (x, y) is
+        # a > x, or a = x and b > y, with < for the descending columns
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        # A previous page is read backwards from the cursor
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith('-') else '-' + field
+                for field in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(ordering, self.cursor.position)
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_previous, self.has_next = more, True
+        else:
+            self.has_previous, self.has_next = self.cursor is not None, more
+        if self.has_next or self.has_previous:
+            self.display_page_controls = True
+        return self.page
+
+    def get_link(self, reverse):
+        if self.page:
+            position = self.get_position(self.page[0 if reverse else -1])
+        else:
+            # Past either end: continue from the cursor the other way
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=reverse, position=position))
+
+    def get_next_link(self):
+        return self.get_link(reverse=False) if self.has_next else None
+
+    def get_previous_link(self):
+        return self.get_link(reverse=True) if self.has_previous else None
+
+    def encode_cursor(self, cursor):
+        values = [
+            {'t': value.isoformat()} if isinstance(value, datetime) else value
+            for value in cursor.position
+        ]
+        encoded = urlsafe_b64encode(
+            json.dumps({'r': int(cursor.reverse), 'p': values}).encode()
+        ).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            position = tuple(
+                parse_datetime(value['t']) if isinstance(value, dict) else value
+                for value in cursor['p']
+            )
+            reverse = bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering) or None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+
+class PollingCursorPagination(CreatedAtCursorPagination):
+    """
+    Keyset pagination, newest first, for lists that clients keep open and
+    poll for new rows (e.g. the comments of a post).
+
+    The first page carries a `poll` link to the rows created after its
+    newest row: ?after=<position> returns them oldest first, up to a page,
+    with the `poll` link to continue from. A poll that finds nothing is a
+    single indexed range scan that returns an empty page.
+    """
+    poll_query_param = 'after'
+    # Position of an empty list: everything created later is new
+    start_position = (datetime(1970, 1, 1, tzinfo=timezone.utc), 0)
+
+    def encode_position(self, position):
+        created_at, pk = position
+        value = f'{created_at.isoformat()}|{pk}'
+        return urlsafe_b64encode(value.encode()).decode()
+
+    def decode_position(self, encoded):
+        try:
+            created_at, pk = urlsafe_b64decode(encoded.encode()).decode().split('|')
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            created_at = None
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.poll_position = None
+        encoded = request.query_params.get(self.poll_query_param)
+        if encoded is None:
+            page = super().paginate_queryset(queryset, request, view)
+            if page is not None and self.cursor is None:
+                self.poll_position = (
+                    self.get_position(page[0]) if page else self.start_position
+                )
+            return page
+
+        self.page_size = self.get_page_size(request)
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), self.cursor_query_param
+        )
+        created_at, pk = self.poll_position = self.decode_position(encoded)
+        page = list(queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+        ).order_by('created_at', 'pk')[:self.page_size])
+        if page:
+            self.poll_position = self.get_position(page[-1])
+        self.has_next = self.has_previous = False
+        return page
+
+    def get_poll_link(self):
+        if self.poll_position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.poll_query_param,
+            self.encode_position(self.poll_position),
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('poll', self.get_poll_link()),
+            ('results', data),
+        ]))
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """
+    Page number pagination by default. Clients opt into keyset pagination
+    with ?pagination=cursor and then follow the next/previous links, which
+    carry a ?cursor= parameter.
+    """
+    cursor_pagination_class = CreatedAtCursorPagination
+    mode_query_param = 'pagination'
+    cursor_paginator = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        page = self.cursor_paginator.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.cursor_paginator.display_page_controls
+        return page
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
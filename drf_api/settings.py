@@ -13,6 +13,16 @@ DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# LOCAL_MEDIA=1 stores uploads under MEDIA_ROOT instead of on Cloudinary,
+# e.g. to work offline; they are served at MEDIA_URL while DEBUG is on.
+LOCAL_MEDIA = os.environ.get('LOCAL_MEDIA') == '1'
+if LOCAL_MEDIA:
+    DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+    MEDIA_ROOT = BASE_DIR / 'media'
+
+# Number of file names whose URLs are memoized (drf_api/media.py)
+MEDIA_URL_CACHE_SIZE = 10000
+
 # Adjust the REST_FRAMEWORK setting based on the DEV environment variable
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -22,8 +32,9 @@ REST_FRAMEWORK = {
         # Tokens in Production
         else 'dj_rest_auth.jwt_auth.JWTCookieAuthentication'
     ],
+    # Page numbers by default, keyset pagination with ?pagination=cursor
     'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.PageNumberPagination',
+        'drf_api.pagination.OptionalCursorPagination',
     'PAGE_SIZE': 10,
     'DATETIME_FORMAT': '%d %b %Y',
 }
@@ -35,6 +46,47 @@ if os.environ.get('DEV') != '1':
         'rest_framework.renderers.JSONRenderer',
     ]
 
+# Home feed (feed app). New posts are copied into the feeds of the owner's
+# followers (fan-out on write) unless the owner has more followers than
+# FEED_FANOUT_MAX_FOLLOWERS; those posts are merged into the feed when it is
+# read. Following someone copies their FEED_BACKFILL_POSTS latest posts.
+FEED_FANOUT_MAX_FOLLOWERS = int(os.environ.get('FEED_FANOUT_MAX_FOLLOWERS', 10000))
+FEED_BACKFILL_POSTS = 50
+
+# Write-behind buffering of likes (likes/buffer.py). When enabled,
+# PUT/DELETE /posts/<pk>/like/ queue the intent in the worker process and it
+# is written in batches every LIKE_BUFFER_FLUSH_INTERVAL seconds, or as soon
+# as LIKE_BUFFER_MAX_PENDING intents are waiting.
+LIKE_BUFFER_ENABLED = os.environ.get('LIKE_BUFFER') == '1'
+LIKE_BUFFER_FLUSH_INTERVAL = float(os.environ.get('LIKE_BUFFER_FLUSH_INTERVAL', 1))
+LIKE_BUFFER_MAX_PENDING = 5000
+
+# Likes and comments count half as much towards a post's trending score
+# (posts/trending.py) after this many hours
+TRENDING_HALF_LIFE_HOURS = 24
+# refresh_trending adds a like or comment to the score once it is this many
+# seconds old, so that the ones committed after their created_at (e.g. by
+# the like buffer) aren't skipped
+TRENDING_EVENT_DELAY = 60
+
+# In-memory follow graph used by the follow filters (followers/graph.py):
+# entries are reloaded after FOLLOW_GRAPH_TTL seconds, the cache holds at
+# most FOLLOW_GRAPH_MAX_IDS user ids (4 bytes each) and lists longer than
+# FOLLOW_GRAPH_MAX_IN_LIST are filtered with a join instead of an IN list.
+FOLLOW_GRAPH_TTL = int(os.environ.get('FOLLOW_GRAPH_TTL', 60))
+FOLLOW_GRAPH_MAX_IDS = int(os.environ.get('FOLLOW_GRAPH_MAX_IDS', 2_000_000))
+FOLLOW_GRAPH_MAX_IN_LIST = 5000
+
+# "Who to follow" (followers/suggestions.py): how many suggestions are kept
+# per user, and up to how many followers of an account are queued for a
+# refresh when it follows or unfollows someone.
+SUGGESTIONS_PER_USER = 50
+SUGGESTIONS_MAX_QUEUED_FOLLOWERS = 1000
+
+# List views build their pages from values() rows rather than with their
+# ModelSerializer (drf_api/fast.py); FAST_LIST_SERIALIZERS=0 turns it off.
+FAST_LIST_SERIALIZERS = os.environ.get('FAST_LIST_SERIALIZERS', '1') == '1'
+
 REST_USE_JWT = True
 JWT_AUTH_SECURE = True
 JWT_AUTH_COOKIE = 'my-app-auth'
@@ -96,11 +148,13 @@ INSTALLED_APPS = [
     'dj_rest_auth.registration',
     'corsheaders',
 
+    'drf_api',
     'profiles',
     'posts',
     'comments',
     'likes',
     'followers',
+    'feed',
 ]
 
 SITE_ID = 1
@@ -183,6 +237,28 @@ else:
     }
     # print('Connected!')
 
+# Cache
+# Local memory by default; set CACHE_DIR to share the cache between the worker
+# processes of one machine through the file system.
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Responses to anonymous reads are cached for this many seconds (0 disables
+# the cache), see drf_api/cache.py
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,140 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from drf_api import media
+from drf_api.management.commands.check_fast_serializers import iter_list_views
+from likes.models import Like
+from posts.models import Post
+from profiles.models import Profile
+
+# Query strings every list is also checked with
+VARIANTS = [
+    '', 'pagination=cursor', 'timestamps=iso', 'timestamps=epoch', 'fields=id',
+    'omit=id',
+]
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class FastSerializerParityTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_data', users=30, seed=1, stdout=StringIO())
+        # The most active user, so that like_id, following_id and is_owner
+        # are set on some rows
+        cls.user = User.objects.order_by('-profile__following_count', 'pk').first()
+
+    def get_queries(self, view_class):
+        queries = list(VARIANTS)
+        for field in getattr(view_class, 'ordering_fields', None) or []:
+            queries.append(f'ordering=-{field}')
+        return queries
+
+    def get(self, url, fast):
+        with override_settings(FAST_LIST_SERIALIZERS=fast):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return json.loads(json.dumps(response.data, default=str))
+
+    def test_fast_serializers_render_as_the_model_serializers(self):
+        views = list(iter_list_views())
+        self.assertTrue(views)
+        for user in (None, self.user):
+            self.client.force_authenticate(user)
+            for path, view_class, kwargs in views:
+                for query in self.get_queries(view_class):
+                    url = f'{path}?{query}' if query else path
+                    with self.subTest(url=url, user=user):
+                        self.assertEqual(self.get(url, True), self.get(url, False))
+
+
+@override_settings(
+    RESPONSE_CACHE_TIMEOUT=300, ALLOWED_HOSTS=['testserver', 'other.example'],
+)
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.post = Post.objects.create(owner=self.owner, title='title')
+
+    def get(self, url='/posts/', **extra):
+        response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_writes_to_the_cache_models_invalidate(self):
+        self.assertEqual(self.get()['X-Cache'], 'MISS')
+        self.assertEqual(self.get()['X-Cache'], 'HIT')
+
+        Like.objects.create(owner=self.owner, post=self.post)
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['likes_count'], 1)
+
+        Post.objects.create(owner=self.owner, title='new')
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(self.get()['X-Cache'], 'HIT')
+
+    def test_query_parameters_and_hosts_are_cached_apart(self):
+        self.assertEqual(self.get()['X-Cache'], 'MISS')
+        self.assertEqual(self.get('/posts/?ordering=-likes_count')['X-Cache'], 'MISS')
+
+        for _ in range(10):
+            Post.objects.create(owner=self.owner, title='more')
+        self.get()
+        response = self.get(HTTP_HOST='other.example')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertTrue(response.data['next'].startswith('http://other.example/'))
+        self.assertTrue(self.get().data['next'].startswith('http://testserver/'))
+
+    def test_authenticated_reads_are_not_cached(self):
+        self.client.force_authenticate(self.owner)
+        self.get()
+        self.assertNotIn('X-Cache', self.get())
+
+
+class MediaURLTests(TestCase):
+    def setUp(self):
+        media.clear()
+        self.storage = mock.Mock()
+        self.storage.url.side_effect = lambda name: f'https://media.example/{name}'
+
+    def tearDown(self):
+        media.clear()
+
+    def test_urls_are_memoized(self):
+        self.assertEqual(media.url(self.storage, 'a.jpg'), 'https://media.example/a.jpg')
+        self.assertEqual(media.url(self.storage, 'a.jpg'), 'https://media.example/a.jpg')
+        self.assertIsNone(media.url(self.storage, ''))
+        self.assertEqual(self.storage.url.call_count, 1)
+
+    @override_settings(MEDIA_URL_CACHE_SIZE=2)
+    def test_least_recently_used_names_are_evicted(self):
+        for name in ('a.jpg', 'b.jpg', 'a.jpg', 'c.jpg', 'a.jpg', 'b.jpg'):
+            media.url(self.storage, name)
+        self.assertEqual(
+            [call.args[0] for call in self.storage.url.call_args_list],
+            ['a.jpg', 'b.jpg', 'c.jpg', 'b.jpg'],
+        )
+
+    def test_saved_and_deleted_images_are_forgotten(self):
+        profile = Profile.objects.get(owner=User.objects.create_user('owner'))
+        name = profile.image.name
+        media.url(self.storage, name)
+        profile.save()
+        media.url(self.storage, name)
+        self.assertEqual(self.storage.url.call_count, 2)
+
+        post = Post.objects.create(owner=profile.owner, title='title', image='post.jpg')
+        media.url(self.storage, 'post.jpg')
+        post.delete()
+        media.url(self.storage, 'post.jpg')
+        self.assertEqual(self.storage.url.call_count, 4)
@@ -0,0 +1,83 @@
+"""
+Timestamps of API responses in the format the client asks for with
+?timestamps=:
+
+- natural (the default): humanized, e.g. "3 minutes ago", to the minute.
+  The text only depends on the age of the timestamp and the language, so
+  it's computed once per age and memoized; and a response that uses it
+  changes once a minute rather than every second.
+- iso: ISO 8601 in UTC, e.g. "2024-05-01T12:30:00.123456Z".
+- epoch: seconds since the Unix epoch, an integer.
+
+With iso or epoch the response only changes when the data does, so it can
+be cached and revalidated (ETag) for as long as that, and the client
+humanizes it. Cached natural responses are keyed on the current minute
+(minute_bucket(), see drf_api/cache.py).
+"""
+import time
+from datetime import timedelta, timezone as dt_timezone
+from functools import lru_cache
+
+from django.contrib.humanize.templatetags.humanize import naturaltime
+from django.utils import timezone
+from django.utils.translation import get_language
+from rest_framework import serializers
+
+QUERY_PARAM = 'timestamps'
+NATURAL, ISO, EPOCH = 'natural', 'iso', 'epoch'
+MODES = (NATURAL, ISO, EPOCH)
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+
+def get_mode(request):
+    mode = request.query_params.get(QUERY_PARAM) if request is not None else None
+    return mode if mode in MODES else NATURAL
+
+
+def minute_bucket():
+    # Changes once a minute, the resolution of the natural timestamps
+    return int(time.time()) // MINUTE
+
+
+def age_bucket(seconds):
+    # naturaltime shows two units at most ("2 hours, 5 minutes ago"), so
+    # past a day the minutes, and past a week the hours, don't show
+    if seconds >= WEEK:
+        return seconds - seconds % DAY
+    if seconds >= DAY:
+        return seconds - seconds % HOUR
+    return max(0, seconds - seconds % MINUTE)
+
+
+@lru_cache(maxsize=4096)
+def natural_age(seconds, language):
+    # `language` is only part of the memoization key: naturaltime
+    # translates to the active language
+    return naturaltime(timezone.now() - timedelta(seconds=seconds))
+
+
+def format_timestamp(value, mode, now=None):
+    if value is None:
+        return None
+    if mode == ISO:
+        return value.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+    if mode == EPOCH:
+        return int(value.timestamp())
+    age = int(((now or timezone.now()) - value).total_seconds())
+    return natural_age(age_bucket(age), get_language())
+
+
+class TimestampField(serializers.ReadOnlyField):
+    """
+    A datetime in the format negotiated with ?timestamps=. The mode and the
+    current time are read once per response, not once per row.
+    """
+    def to_representation(self, value):
+        if not hasattr(self, '_mode'):
+            self._mode = get_mode(self.context.get('request'))
+            self._now = timezone.now()
+        return format_timestamp(value, self._mode, self._now)
@@ -0,0 +1,103 @@
+"""
+Idempotent PUT/DELETE endpoints for rows that link the current user to an
+object once at most, e.g. a like (owner, post) or a follow
+(owner, followed), guarded by a unique constraint.
+
+Creating such a row with save() on a double tap raises IntegrityError (on
+Postgres after a rolled back statement) and the client gets a 400; deleting
+it needs its id first. Here PUT is an INSERT ... ON CONFLICT DO NOTHING and
+DELETE a delete keyed on the unique fields, and both answer with the new
+state. The post_save/post_delete signals are sent only by the request that
+actually inserted or deleted the row, so the counters their receivers keep
+stay right under concurrent taps.
+"""
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+
+from .bulk import delete_by_pk, insert_or_ignore
+
+
+def attnames(model, values):
+    # {'owner': 1} -> {'owner_id': 1}, to build instances from raw ids
+    return {model._meta.get_field(name).attname: value for name, value in values.items()}
+
+
+def add_unique(model, **values):
+    """
+    Insert the row with these values (ids for foreign keys) unless it
+    exists. Return (pk, created); pk is None if the row existed but was
+    deleted concurrently.
+    """
+    lookup = attnames(model, values)
+    now = timezone.now()
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            values.setdefault(field.name, now)
+    with transaction.atomic():
+        pk = insert_or_ignore(model, **values)
+        if pk is None:
+            # The row exists, unless a concurrent DELETE removed it since:
+            # then its pk is None, the current state
+            pk = model.objects.filter(**lookup).values_list('pk', flat=True).first()
+            return pk, False
+        instance = model(pk=pk, **attnames(model, values))
+        post_save.send(
+            sender=model, instance=instance, created=True, update_fields=None,
+            raw=False, using=connection.alias,
+        )
+    return pk, True
+
+
+def remove_unique(model, **values):
+    """
+    Delete the row with these values, if any, and return its pk.
+    Only for models that no other rows depend on: there is no cascade.
+    """
+    lookup = attnames(model, values)
+    with transaction.atomic():
+        pk = model.objects.filter(**lookup).values_list('pk', flat=True).first()
+        if pk is None or not delete_by_pk(model, pk):
+            return None
+        post_delete.send(
+            sender=model, instance=model(pk=pk, **lookup), using=connection.alias,
+        )
+    return pk
+
+
+class ToggleView(generics.GenericAPIView):
+    """
+    PUT creates and DELETE removes the `toggle_model` row linking the
+    current user, its `owner`, to the object at this URL: its `toggle_field`
+    is the object's `toggle_source` attribute. Subclasses implement
+    get_response_data(obj, pk), the response data from the row's id (None
+    once removed) and the updated counters.
+    """
+    toggle_model = None
+    toggle_field = None
+    toggle_source = 'pk'
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_toggle_values(self, obj):
+        return {
+            'owner': self.request.user.pk,
+            self.toggle_field: getattr(obj, self.toggle_source),
+        }
+
+    def respond(self, obj, pk, status_code):
+        serializer = self.get_serializer(self.get_response_data(obj, pk))
+        return Response(serializer.data, status=status_code)
+
+    def put(self, request, *args, **kwargs):
+        obj = self.get_object()
+        pk, created = add_unique(self.toggle_model, **self.get_toggle_values(obj))
+        return self.respond(
+            obj, pk, status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    def delete(self, request, *args, **kwargs):
+        obj = self.get_object()
+        remove_unique(self.toggle_model, **self.get_toggle_values(obj))
+        return self.respond(obj, None, status.HTTP_200_OK)
@@ -0,0 +1,30 @@
+"""
+Edits that only write the columns the client can change.
+
+A full instance.save() writes every column back from the instance loaded
+by get_object(), including the denormalized counters (likes_count,
+followers_count...) that the signal receivers update with F() increments
+in the meantime: a like or a follow that lands while an edit is in flight
+would be lost. UpdateFieldsMixin saves with update_fields set to the
+serializer's writable fields, plus the auto_now updated_at.
+"""
+
+
+class UpdateFieldsMixin:
+    def get_update_fields(self, serializer):
+        model_fields = {
+            field.name for field in serializer.Meta.model._meta.concrete_fields
+        }
+        fields = {
+            field.source for field in serializer.fields.values()
+            if not field.read_only and field.source in model_fields
+        }
+        if 'updated_at' in model_fields:
+            fields.add('updated_at')
+        return sorted(fields)
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        for attr, value in serializer.validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=self.get_update_fields(serializer))
@@ -1,10 +1,13 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from .views import endpoint_list, logout_route
+from .views import endpoint_list, logout_route, response_cache_stats
 
 urlpatterns = [
     path('', endpoint_list),
     path('admin/', admin.site.urls),
+    path('cache-stats/', response_cache_stats),
     path('api-auth/', include('rest_framework.urls')),
     # our logout route has to be above the default one to be matched first
     path('dj-rest-auth/logout/', logout_route),
@@ -15,4 +18,9 @@ urlpatterns = [
     path('', include('comments.urls')),
     path('', include('likes.urls')),
     path('', include('followers.urls')),
+    path('', include('feed.urls')),
 ]
+
+if settings.LOCAL_MEDIA:
+    # Uploads stored on the local filesystem, served while DEBUG is on
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,5 +1,7 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from .cache import get_stats
 from .settings import (
     JWT_AUTH_COOKIE,
     JWT_AUTH_REFRESH_COOKIE,
@@ -16,11 +18,13 @@ def endpoint_list(request):
         'http://127.0.0.1:8000/comments/',
         'http://127.0.0.1:8000/likes/',
         'http://127.0.0.1:8000/followers/',
+        'http://127.0.0.1:8000/feed/',
         'https://drf-api-app-gaysha-repeat-150999686cdd.herokuapp.com/profiles/',
         'https://drf-api-app-gaysha-repeat-150999686cdd.herokuapp.com/posts/',
         'https://drf-api-app-gaysha-repeat-150999686cdd.herokuapp.com/comments/',
         'https://drf-api-app-gaysha-repeat-150999686cdd.herokuapp.com/likes/',
         'https://drf-api-app-gaysha-repeat-150999686cdd.herokuapp.com/followers/',
+        'https://drf-api-app-gaysha-repeat-150999686cdd.herokuapp.com/feed/',
     ]
     )
 
@@ -48,3 +52,10 @@ def logout_route(request):
         secure=JWT_AUTH_SECURE,
     )
     return response
+
+
+# Hit/miss counts of the anonymous response cache (drf_api/cache.py)
+@api_view()
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    return Response(get_stats())
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from drf_api.bulk import chunked
+from feed.models import FeedItem, fan_out_account
+from followers.models import Follower
+from profiles.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        'Materialize the home feeds from the follow graph: every follower gets '
+        'the FEED_BACKFILL_POSTS latest posts of each account they follow, as '
+        'if they had just followed it. Run it once after installing the feed '
+        'app, or after bulk-loading follows or posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete all the feed items before rebuilding.',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            FeedItem.objects.all().delete()
+
+        merged_on_read = set(Profile.objects.filter(
+            followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+        ).values_list('owner_id', flat=True))
+        followed_ids = Follower.objects.order_by().values_list(
+            'followed_id', flat=True
+        ).distinct()
+
+        accounts = 0
+        # One transaction per few hundred accounts: committing after every
+        # account costs more than the inserts on SQLite
+        for chunk in chunked(followed_ids.iterator(), 500):
+            with transaction.atomic():
+                for followed_id in chunk:
+                    if followed_id in merged_on_read:
+                        continue
+                    fan_out_account(followed_id)
+                    accounts += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Fanned out the posts of {accounts} followed account(s)'
+        ))
@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.contrib.auth.models import User
+from followers.models import Follower
+from posts.models import Post
+from profiles.models import Profile
+from drf_api.bulk import insert_rows
+
+
+class FeedItem(models.Model):
+    """
+    A post materialized in the home feed of 'owner', i.e. a User instance
+    following the post's owner. created_at is copied from the post so that
+    a feed page is read newest first with one range scan of the
+    (owner, created_at, post) index.
+    """
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='feed_items'
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='feed_items'
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = [['owner', 'post']]
+        indexes = [models.Index(fields=['owner', '-created_at', '-post'])]
+
+    def __str__(self):
+        return f"{self.owner} {self.post}"
+
+
+# Posts of accounts with more than FEED_FANOUT_MAX_FOLLOWERS followers are
+# not copied into their followers' feeds (that would be one INSERT per
+# follower for every post); FeedList merges them in at read time instead.
+def is_fanned_out(user_id):
+    return not Profile.objects.filter(
+        owner_id=user_id,
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).exists()
+
+
+def add_to_feeds(owner_ids, posts):
+    # Plain multi-row INSERTs (drf_api/bulk.py): a popular account's post
+    # goes to thousands of feeds
+    insert_rows(FeedItem, ('owner', 'post', 'created_at'), (
+        (owner_id, post.id, post.created_at)
+        for owner_id in owner_ids
+        for post in posts
+    ), batch_size=1000, ignore_conflicts=True)
+
+
+def fan_out_account(followed_id):
+    # Copy the account's most recent posts into the feed of every follower
+    posts = list(Post.objects.filter(owner_id=followed_id).only(
+        'id', 'created_at'
+    )[:settings.FEED_BACKFILL_POSTS])
+    follower_ids = Follower.objects.filter(
+        followed_id=followed_id
+    ).values_list('owner_id', flat=True)
+    add_to_feeds(follower_ids.iterator(), posts)
+
+
+def backfill_feed(owner_id, followed_id):
+    # Copy the followed user's most recent posts into the follower's feed
+    if is_fanned_out(followed_id):
+        posts = Post.objects.filter(owner_id=followed_id).only(
+            'id', 'created_at'
+        )[:settings.FEED_BACKFILL_POSTS]
+        add_to_feeds([owner_id], posts)
+
+
+# Fan-out on write: a new post is added to the feed of every follower of
+# its owner.
+def fan_out_post(sender, instance, created, **kwargs):
+    if created and is_fanned_out(instance.owner_id):
+        follower_ids = Follower.objects.filter(
+            followed_id=instance.owner_id
+        ).values_list('owner_id', flat=True)
+        add_to_feeds(follower_ids.iterator(), [instance])
+
+
+def backfill_followed_posts(sender, instance, created, **kwargs):
+    if created:
+        backfill_feed(instance.owner_id, instance.followed_id)
+
+
+# Unfollowing removes the unfollowed user's posts from the feed
+def prune_followed_posts(sender, instance, **kwargs):
+    FeedItem.objects.filter(
+        owner_id=instance.owner_id, post__owner_id=instance.followed_id
+    ).delete()
+
+
+# An account that goes back down to FEED_FANOUT_MAX_FOLLOWERS followers is
+# fanned out on write again, and no longer merged in at read time: its
+# recent posts, including the ones it made while above the threshold, are
+# copied into its followers' feeds. After the commit, with the rows that
+# still exist then: the unfollow may be part of deleting the account.
+def fan_out_again(sender, instance, **kwargs):
+    followers_count = Profile.objects.filter(
+        owner_id=instance.followed_id
+    ).values_list('followers_count', flat=True).first()
+    if followers_count == settings.FEED_FANOUT_MAX_FOLLOWERS:
+        followed_id = instance.followed_id
+        transaction.on_commit(lambda: fan_out_account(followed_id))
+
+
+post_save.connect(fan_out_post, sender=Post)
+post_save.connect(backfill_followed_posts, sender=Follower)
+post_delete.connect(prune_followed_posts, sender=Follower)
+post_delete.connect(fan_out_again, sender=Follower)
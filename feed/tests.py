@@ -0,0 +1,61 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from followers.models import Follower
+from posts.models import Post
+from .models import FeedItem
+
+
+class FeedTests(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='pass')
+        self.readers = [
+            User.objects.create_user(f'reader{number}', password='pass')
+            for number in range(2)
+        ]
+
+    def feed_items(self, reader):
+        return list(
+            FeedItem.objects.filter(owner=reader).values_list('post_id', flat=True)
+        )
+
+    def feed(self, reader):
+        self.client.force_authenticate(reader)
+        response = self.client.get('/feed/')
+        self.assertEqual(response.status_code, 200)
+        return [post['id'] for post in response.data['results']]
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        old = Post.objects.create(owner=self.author, title='old')
+        Follower.objects.create(owner=self.readers[0], followed=self.author)
+        self.assertEqual(self.feed_items(self.readers[0]), [old.pk])
+
+        new = Post.objects.create(owner=self.author, title='new')
+        self.assertEqual(self.feed(self.readers[0]), [new.pk, old.pk])
+        self.assertEqual(self.feed(self.readers[1]), [])
+
+    def test_unfollow_prunes_the_feed(self):
+        Follower.objects.create(owner=self.readers[0], followed=self.author)
+        Post.objects.create(owner=self.author, title='post')
+        Follower.objects.get(owner=self.readers[0]).delete()
+        self.assertEqual(self.feed_items(self.readers[0]), [])
+        self.assertEqual(self.feed(self.readers[0]), [])
+
+    def test_anonymous_users_have_no_feed(self):
+        self.assertEqual(self.client.get('/feed/').status_code, 403)
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_account_back_under_the_threshold_is_fanned_out(self):
+        for reader in self.readers:
+            Follower.objects.create(owner=reader, followed=self.author)
+        # Two followers: merged in at read time, not fanned out
+        post = Post.objects.create(owner=self.author, title='post')
+        self.assertEqual(self.feed_items(self.readers[0]), [])
+        self.assertEqual(self.feed(self.readers[0]), [post.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Follower.objects.get(owner=self.readers[1]).delete()
+        self.assertEqual(self.feed_items(self.readers[0]), [post.pk])
+        self.assertEqual(self.feed(self.readers[0]), [post.pk])
+        self.assertEqual(self.feed(self.readers[1]), [])
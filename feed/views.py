@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db.models import F, Q
+from rest_framework import generics, permissions
+from drf_api.fieldsets import SparseFieldsetMixin
+from drf_api.pagination import CreatedAtCursorPagination
+from followers.models import Follower
+from posts.models import Post
+from posts.serializers import PostSerializer
+from posts.views import LikeIdMixin
+from .models import FeedItem
+
+
+class FeedCursorPagination(CreatedAtCursorPagination):
+    # feed_at is the FeedItem.created_at of the post, i.e. its creation time
+    ordering = ('-feed_at', '-id')
+
+
+class FeedList(LikeIdMixin, SparseFieldsetMixin, generics.ListAPIView):
+    """
+    Home feed of the current user: posts from the profiles they follow,
+    newest first, paginated by cursor.
+    """
+    queryset = Post.objects.select_related('owner__profile')
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        # Followed accounts whose posts are not fanned out on write
+        # (see feed/models.py) have to be merged in at read time
+        merged_owner_ids = list(
+            Follower.objects.filter(
+                owner=user,
+                followed__profile__followers_count__gt=(
+                    settings.FEED_FANOUT_MAX_FOLLOWERS
+                ),
+            ).values_list('followed_id', flat=True)
+        )
+        if not merged_owner_ids:
+            # The common case: a single range scan of the user's feed items
+            return queryset.filter(feed_items__owner=user).annotate(
+                feed_at=F('feed_items__created_at')
+            )
+        return queryset.filter(
+            Q(pk__in=FeedItem.objects.filter(owner=user).values('post'))
+            | Q(owner_id__in=merged_owner_ids)
+        ).annotate(feed_at=F('created_at'))
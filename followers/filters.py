@@ -0,0 +1,79 @@
+from functools import reduce
+
+import django_filters
+from rest_framework.settings import api_settings
+
+from profiles.models import Profile
+from . import graph
+
+
+class FollowFilter(django_filters.ModelChoiceFilter):
+    """
+    Filter on the follows of the owner of the profile with the given id,
+    answered from the follow graph cache (followers/graph.py):
+    `owner_id IN (followers or followings of that user)`.
+
+    `field_name` is the equivalent lookup through the Follower table, used
+    when the list is too long for an IN list, and when the request is
+    ordered by the same relation (e.g. ?ordering=-owner__following__created_at,
+    the date of the follow), which only means something on the joined row.
+    """
+    def __init__(self, direction, *args, **kwargs):
+        self.direction = direction
+        kwargs.setdefault('queryset', Profile.objects.only('id', 'owner_id'))
+        super().__init__(*args, **kwargs)
+
+    def neighbour_ids(self, profile):
+        return graph.neighbours(self.direction, profile.owner_id)
+
+    def needs_join(self):
+        request = self.parent.request
+        if request is None:
+            return False
+        # 'owner__following__followed__profile' -> 'owner__following__'
+        relation = self.field_name.rsplit('__', 2)[0] + '__'
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM, '')
+        return any(
+            field.strip().lstrip('-').startswith(relation)
+            for field in ordering.split(',')
+        )
+
+    def filter(self, qs, value):
+        if value in django_filters.constants.EMPTY_VALUES:
+            return qs
+        if self.needs_join():
+            return super().filter(qs, value)
+        ids = self.neighbour_ids(value)
+        if len(ids) > graph.max_in_list():
+            return super().filter(qs, value)
+        return qs.filter(owner_id__in=ids)
+
+
+class FollowFilterSet(django_filters.FilterSet):
+    """
+    FilterSet of a model with an `owner`, whose FollowFilters given
+    together are combined by intersecting the id arrays in memory, so the
+    query gets a single IN list.
+    """
+    def filter_queryset(self, queryset):
+        values = self.form.cleaned_data
+        follows = [
+            name for name, value in values.items()
+            if isinstance(self.filters[name], FollowFilter)
+            and value not in django_filters.constants.EMPTY_VALUES
+        ]
+        combined = []
+        if len(follows) > 1 and not any(
+            self.filters[name].needs_join() for name in follows
+        ):
+            ids = reduce(graph.intersect, (
+                self.filters[name].neighbour_ids(values[name]) for name in follows
+            ))
+            if len(ids) <= graph.max_in_list():
+                queryset = queryset.filter(owner_id__in=ids)
+                combined = follows
+
+        for name, value in values.items():
+            if name not in combined:
+                queryset = self.filters[name].filter(queryset, value)
+        return queryset
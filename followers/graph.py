@@ -0,0 +1,215 @@
+"""
+In-memory adjacency cache of the follow graph, used by the profile and
+post filters on follows (`owner__following__followed__profile` and
+`owner__followed__owner__profile`).
+
+Without it those filters join Profile/Post to User, Follower, User and
+Profile again for every request. Here each user's followers and followings
+are kept as a sorted array of user ids, loaded with one indexed query the
+first time they are needed, and the filters become `owner_id IN (...)`;
+combining both filters is an intersection of two arrays.
+
+- Arrays are kept in step with Follower's post_save/post_delete signals,
+  applied once the transaction commits.
+- Entries older than FOLLOW_GRAPH_TTL seconds are reloaded: follows made
+  through other worker processes, or written without signals (bulk
+  imports), show up after at most that long.
+- The cache holds at most FOLLOW_GRAPH_MAX_IDS ids; the least recently
+  used users are evicted first. A list longer than the cap is never
+  cached, and one longer than FOLLOW_GRAPH_MAX_IN_LIST isn't turned into
+  an IN list: the filters fall back to the join for it.
+"""
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+# The two directions of an edge owner -> followed, and the column that
+# holds the neighbours' ids for each
+FOLLOWERS = 'followers'
+FOLLOWING = 'following'
+COLUMNS = {
+    FOLLOWERS: ('followed_id', 'owner_id'),
+    FOLLOWING: ('owner_id', 'followed_id'),
+}
+
+# User ids are AutoField ids, 32-bit signed integers
+TYPECODE = 'i'
+
+_lock = threading.Lock()
+# (direction, user_id) -> (sorted array of user ids, loaded at), oldest first
+_entries = OrderedDict()
+_stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'ids': 0}
+
+
+def _load(direction, user_id):
+    # followers/models.py imports this module to connect the receivers
+    from .models import Follower
+
+    key_column, value_column = COLUMNS[direction]
+    ids = Follower.objects.filter(**{key_column: user_id}).order_by(
+        value_column
+    ).values_list(value_column, flat=True)
+    return array(TYPECODE, ids.iterator())
+
+
+def _evict(needed):
+    # Called with _lock held
+    while _entries and _stats['ids'] + needed > settings.FOLLOW_GRAPH_MAX_IDS:
+        key, (ids, loaded_at) = _entries.popitem(last=False)
+        _stats['ids'] -= len(ids)
+        _stats['evictions'] += 1
+
+
+def neighbours(direction, user_id):
+    """
+    Return the sorted array of ids of the users following (FOLLOWERS) or
+    followed by (FOLLOWING) the user. Don't modify it.
+    """
+    key = (direction, user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            if now - entry[1] < settings.FOLLOW_GRAPH_TTL:
+                _entries.move_to_end(key)
+                _stats['hits'] += 1
+                return entry[0]
+            del _entries[key]
+            _stats['ids'] -= len(entry[0])
+            _stats['expired'] += 1
+        _stats['misses'] += 1
+
+    ids = _load(direction, user_id)
+    if len(ids) <= settings.FOLLOW_GRAPH_MAX_IDS:
+        with _lock:
+            previous = _entries.pop(key, None)
+            if previous is not None:
+                # Loaded by another thread meanwhile
+                _stats['ids'] -= len(previous[0])
+            _evict(len(ids))
+            _entries[key] = (ids, now)
+            _stats['ids'] += len(ids)
+    return ids
+
+
+def cached(direction, user_id):
+    """Like neighbours(), but None unless the array is cached and fresh."""
+    with _lock:
+        entry = _entries.get((direction, user_id))
+        if entry is None or time.monotonic() - entry[1] >= settings.FOLLOW_GRAPH_TTL:
+            return None
+        _entries.move_to_end((direction, user_id))
+        _stats['hits'] += 1
+        return entry[0]
+
+
+def followers(user_id):
+    return neighbours(FOLLOWERS, user_id)
+
+
+def following(user_id):
+    return neighbours(FOLLOWING, user_id)
+
+
+def intersect(first, second):
+    """Ids present in both sorted arrays, as a sorted array."""
+    if len(first) > len(second):
+        first, second = second, first
+    result = array(TYPECODE)
+    start = 0
+    # Binary search the longer array for each id of the shorter one
+    for value in first:
+        start = bisect_left(second, value, start)
+        if start == len(second):
+            break
+        if second[start] == value:
+            result.append(value)
+    return result
+
+
+def followers_among(user_id, candidate_ids):
+    """
+    Sorted array of the candidate ids (sorted) that follow the user. A
+    popular account's followers aren't loaded just for this: unless they
+    are cached already, the candidates are looked up in the
+    (owner, followed) unique index, one probe each.
+    """
+    ids = cached(FOLLOWERS, user_id)
+    if ids is None and len(candidate_ids) <= max_in_list():
+        from .models import Follower
+
+        return array(TYPECODE, Follower.objects.filter(
+            followed_id=user_id, owner_id__in=candidate_ids,
+        ).order_by('owner_id').values_list('owner_id', flat=True))
+    if ids is None:
+        ids = followers(user_id)
+    return intersect(candidate_ids, ids)
+
+
+def max_in_list():
+    # An IN list uses one query parameter per id
+    limit = settings.FOLLOW_GRAPH_MAX_IN_LIST
+    if connection.features.max_query_params:
+        limit = min(limit, connection.features.max_query_params - 100)
+    return limit
+
+
+def _update(owner_id, followed_id, added):
+    for direction, key_id, value in (
+        (FOLLOWERS, followed_id, owner_id), (FOLLOWING, owner_id, followed_id),
+    ):
+        with _lock:
+            entry = _entries.get((direction, key_id))
+            if entry is None:
+                continue
+            ids, loaded_at = entry
+            index = bisect_left(ids, value)
+            present = index < len(ids) and ids[index] == value
+            if added == present:
+                continue
+            # Copied rather than changed in place: a request may be reading
+            # the array it got from neighbours()
+            if added:
+                ids = ids[:index] + array(TYPECODE, [value]) + ids[index:]
+            else:
+                ids = ids[:index] + ids[index + 1:]
+            _entries[direction, key_id] = (ids, loaded_at)
+            _stats['ids'] += 1 if added else -1
+
+
+def follow_added(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: _update(instance.owner_id, instance.followed_id, True)
+        )
+
+
+def follow_removed(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: _update(instance.owner_id, instance.followed_id, False)
+    )
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+        _stats.update(dict.fromkeys(_stats, 0))
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats['users'] = len(_entries)
+        stats['bytes'] = sum(
+            sys.getsizeof(ids) for ids, loaded_at in _entries.values()
+        )
+    stats['max_ids'] = settings.FOLLOW_GRAPH_MAX_IDS
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+    return stats
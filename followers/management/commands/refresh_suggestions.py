@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from drf_api.cache import bump_generation
+from followers import graph
+from followers.models import Suggestion, SuggestionRefresh
+from followers.suggestions import queue_all, refresh
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the "who to follow" suggestions of the users whose follow '
+        'graph changed since the last run (see followers/suggestions.py). '
+        'Run it periodically, e.g. from cron, or keep it running with --every.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute every user, e.g. after bulk-loading follows.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of users recomputed per transaction.',
+        )
+        parser.add_argument(
+            '--every', type=float, metavar='SECONDS',
+            help='Keep running, refreshing every SECONDS.',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            queue_all()
+        while True:
+            started = time.perf_counter()
+            users, suggestions = self.refresh(options['batch_size'])
+            self.stdout.write(
+                f'Refreshed {suggestions} suggestion(s) for {users} user(s) in '
+                f'{time.perf_counter() - started:.2f}s'
+            )
+            if not options['every']:
+                return
+            time.sleep(options['every'])
+
+    def refresh(self, batch_size):
+        # This process doesn't get the signals of the follows made through
+        # the API: start every run from the database
+        graph.clear()
+        # Users queued again during the run wait for the next one, which
+        # reads their new follows
+        queued = SuggestionRefresh.objects.filter(queued_at__lte=timezone.now())
+        users = suggestions = 0
+        while True:
+            user_ids = list(queued.values_list('owner_id', flat=True)[:batch_size])
+            if not user_ids:
+                break
+            suggestions += refresh(user_ids)
+            users += len(user_ids)
+        if users:
+            # Written without signals (drf_api/cache.py)
+            bump_generation(Suggestion)
+        return users, suggestions
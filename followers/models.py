@@ -1,5 +1,12 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
+from profiles.models import Profile
+from drf_api.bulk import insert_rows
+from drf_api.cache import bump_generation
+from . import graph
 
 
 class Follower(models.Model):
@@ -40,6 +47,8 @@ class Follower(models.Model):
     # (the followed), user A is the follower, and user B is the one being followed.
     class Meta:
         ordering = ['-created_at']
+        # Keyset (cursor) pagination on (created_at, id), see drf_api/pagination.py
+        indexes = [models.Index(fields=['-created_at', '-id'])]
         # The unique_together constraint ensures that a User can only follow another
         # User once (i.e., a user cannot follow the same user multiple times).
         unique_together=[['owner', 'followed']]
@@ -64,3 +73,109 @@ class Follower(models.Model):
     # reverse relationship from an instance of the User model, you use the
     # related_name (followed in this case, as defined in your model).
 
+
+class Suggestion(models.Model):
+    """
+    An account suggested to 'owner' to follow ("who to follow"): followed
+    by `mutual_count` of the accounts the owner follows, and not followed
+    by the owner yet. Computed in batch by
+    `python manage.py refresh_suggestions` (followers/suggestions.py).
+    """
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='suggestions'
+    )
+    suggested = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+'
+    )
+    mutual_count = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['-mutual_count', 'suggested']
+        unique_together = [['owner', 'suggested']]
+        # A user's suggestions are read best first with one range scan
+        indexes = [models.Index(fields=['owner', '-mutual_count', 'suggested'])]
+
+    def __str__(self):
+        return f"{self.owner} {self.suggested}"
+
+
+class SuggestionRefresh(models.Model):
+    """
+    A user whose follows, or whose followings' follows, changed since their
+    suggestions were computed; refresh_suggestions picks them up.
+    """
+    owner = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='+'
+    )
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['queued_at']
+
+
+# Keep Profile.followers_count (of the followed user) and
+# Profile.following_count (of the owner) in step with the Follower rows.
+# Both profiles are updated in one transaction so the two counters can't
+# disagree about a follow.
+def update_follow_counts(follower, delta):
+    with transaction.atomic():
+        Profile.objects.filter(owner_id=follower.followed_id).update(
+            followers_count=F('followers_count') + delta
+        )
+        Profile.objects.filter(owner_id=follower.owner_id).update(
+            following_count=F('following_count') + delta
+        )
+
+
+def increment_follow_counts(sender, instance, created, **kwargs):
+    if created:
+        update_follow_counts(instance, 1)
+
+
+def decrement_follow_counts(sender, instance, **kwargs):
+    update_follow_counts(instance, -1)
+
+
+post_save.connect(increment_follow_counts, sender=Follower)
+post_delete.connect(decrement_follow_counts, sender=Follower)
+
+# Invalidate the cached anonymous responses built from Followers (drf_api/cache.py)
+post_save.connect(bump_generation, sender=Follower)
+post_delete.connect(bump_generation, sender=Follower)
+
+# Keep the in-memory follow graph (followers/graph.py) in step
+post_save.connect(graph.follow_added, sender=Follower)
+post_delete.connect(graph.follow_removed, sender=Follower)
+
+
+# A follow A -> B changes the friends of friends of A and of everyone
+# following A. A's followers are only queued when there are at most
+# SUGGESTIONS_MAX_QUEUED_FOLLOWERS of them; a popular account's followers
+# catch up at the next `refresh_suggestions --all`. Their number is read
+# from A's followers_count, so that a popular account's followers aren't
+# loaded on every follow.
+def queue_suggestion_refresh(sender, instance, **kwargs):
+    if kwargs.get('created') is False:
+        return
+    owner_ids = [instance.owner_id]
+    followers_count = Profile.objects.filter(
+        owner_id=instance.owner_id
+    ).values_list('followers_count', flat=True).first() or 0
+    if followers_count <= settings.SUGGESTIONS_MAX_QUEUED_FOLLOWERS:
+        owner_ids.extend(graph.followers(instance.owner_id))
+    # After the commit: deleting a user first deletes their Follower rows,
+    # and a refresh queued for them then would block the user's deletion
+    transaction.on_commit(lambda: insert_suggestion_refreshes(owner_ids))
+
+
+def insert_suggestion_refreshes(owner_ids):
+    """Queue the owners that still exist for refresh_suggestions."""
+    existing = User.objects.filter(pk__in=owner_ids).values_list('pk', flat=True)
+    insert_rows(
+        SuggestionRefresh, ('owner',), ((owner_id,) for owner_id in existing),
+        ignore_conflicts=True,
+    )
+
+
+post_save.connect(queue_suggestion_refresh, sender=Follower)
+post_delete.connect(queue_suggestion_refresh, sender=Follower)
@@ -1,8 +1,11 @@
 from django.db import IntegrityError
 from rest_framework import serializers
-from .models import Follower
+from drf_api.fast import DateTime, FastSerializer, Value
+from drf_api.fieldsets import SparseFieldsetSerializerMixin
+from drf_api.media import MediaURLField
+from .models import Follower, Suggestion
 
-class FollowerSerializer(serializers.ModelSerializer):
+class FollowerSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     followed_name = serializers.ReadOnlyField(source='followed.username')
 
@@ -17,4 +20,56 @@ class FollowerSerializer(serializers.ModelSerializer):
         except IntegrityError:
             raise serializers.ValidationError({
                 'detail': 'possible duplicate',
-            })
\ No newline at end of file
+            })
+
+class ProfileFollowSerializer(serializers.Serializer):
+    """
+    Response of PUT/DELETE /profiles/<pk>/follow/: the current user's follow
+    of the profile's owner (null once unfollowed), the profile's new
+    followers_count and the current user's new following_count.
+    """
+    profile = serializers.IntegerField(read_only=True)
+    following_id = serializers.IntegerField(read_only=True, allow_null=True)
+    followers_count = serializers.IntegerField(read_only=True)
+    following_count = serializers.IntegerField(read_only=True)
+
+
+class SuggestionSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """
+    An account suggested to the profile's owner, and how many of the
+    accounts they follow follow it.
+    """
+    username = serializers.ReadOnlyField(source='suggested.username')
+    profile_id = serializers.ReadOnlyField(source='suggested.profile.id')
+    profile_image = MediaURLField(source='suggested.profile.image')
+
+    class Meta:
+        model = Suggestion
+        fields = ['profile_id', 'username', 'profile_image', 'mutual_count']
+
+
+class MutualSerializer(serializers.Serializer):
+    profile_id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(read_only=True)
+
+
+class ProfileMutualsSerializer(serializers.Serializer):
+    """
+    Response of GET /profiles/<pk>/mutuals/: how many of the accounts the
+    current user follows follow the profile's owner, and the first of them.
+    """
+    profile = serializers.IntegerField(read_only=True)
+    count = serializers.IntegerField(read_only=True)
+    results = MutualSerializer(many=True, read_only=True)
+
+
+class FastFollowerSerializer(FastSerializer):
+    """FollowerSerializer for list responses, see drf_api/fast.py."""
+    serializer_class = FollowerSerializer
+    fields = {
+        'id': Value('id'),
+        'owner': Value('owner__username'),
+        'created_at': DateTime('created_at'),
+        'followed': Value('followed'),
+        'followed_name': Value('followed__username'),
+    }
@@ -0,0 +1,66 @@
+"""
+"Who to follow": friends-of-friends suggestions, computed in batch.
+
+The candidates for a user are the accounts followed by the accounts they
+follow, ranked by how many of those follow them (mutual_count), ties going
+to the lower user id; the user themselves and the accounts they already
+follow are left out. The followings of every user are read as sorted id
+arrays from the follow graph cache (followers/graph.py), so an account
+followed by many of the users in a batch is loaded once, and they are
+counted with Counter.update(), which runs in C.
+
+Follows queue the users whose suggestions they change (SuggestionRefresh,
+see followers/models.py) and `python manage.py refresh_suggestions` only
+recomputes those.
+"""
+import heapq
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from drf_api.bulk import insert_rows
+from . import graph
+from .models import Follower, Suggestion, SuggestionRefresh
+
+
+def suggest(user_id, limit=None):
+    """Return the best [(suggested_id, mutual_count)] for the user."""
+    following = graph.following(user_id)
+    counts = Counter()
+    for followed_id in following:
+        counts.update(graph.following(followed_id))
+    counts.pop(user_id, None)
+    for followed_id in following:
+        counts.pop(followed_id, None)
+    return heapq.nlargest(
+        limit or settings.SUGGESTIONS_PER_USER, counts.items(),
+        key=lambda item: (item[1], -item[0]),
+    )
+
+
+def refresh(user_ids):
+    """Replace the stored suggestions of the users."""
+    # Dequeued before the graph is read: a follow that comes in while the
+    # suggestions are computed queues the user again for the next run
+    SuggestionRefresh.objects.filter(owner_id__in=user_ids).delete()
+    rows = [
+        (user_id, suggested_id, mutual_count)
+        for user_id in user_ids
+        for suggested_id, mutual_count in suggest(user_id)
+    ]
+    with transaction.atomic():
+        Suggestion.objects.filter(owner_id__in=user_ids).delete()
+        insert_rows(Suggestion, ('owner', 'suggested', 'mutual_count'), rows)
+    return len(rows)
+
+
+def queue_all():
+    """Queue every user who follows someone or has suggestions."""
+    owner_ids = Follower.objects.order_by().values_list('owner_id', flat=True).union(
+        Suggestion.objects.order_by().values_list('owner_id', flat=True)
+    )
+    insert_rows(
+        SuggestionRefresh, ('owner',), ((owner_id,) for owner_id in owner_ids.iterator()),
+        batch_size=1000, ignore_conflicts=True,
+    )
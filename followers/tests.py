@@ -1,3 +1,227 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from profiles.models import Profile
+from . import graph
+from .models import Follower, Suggestion, SuggestionRefresh
+
+
+class ProfileFollowTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.follower = User.objects.create_user('follower', password='pass')
+        self.profile = Profile.objects.get(owner=self.owner)
+        self.url = f'/profiles/{self.profile.pk}/follow/'
+
+    def test_follow_and_unfollow_answer_with_the_counters(self):
+        self.client.force_authenticate(self.follower)
+        response = self.client.put(self.url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['followers_count'], 1)
+        self.assertEqual(response.data['following_count'], 1)
+
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['followers_count'], 0)
+        self.assertEqual(response.data['following_count'], 0)
+
+    def test_follow_by_a_user_without_a_profile(self):
+        Profile.objects.filter(owner=self.follower).delete()
+        self.client.force_authenticate(self.follower)
+        response = self.client.put(self.url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['followers_count'], 1)
+        self.assertEqual(response.data['following_count'], 0)
+
+
+class SuggestionRefreshQueueTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(f'user{number}', password='pass')
+            for number in range(4)
+        ]
+        # users 2 and 3 follow user 0
+        for follower in self.users[2:]:
+            Follower.objects.create(owner=follower, followed=self.users[0])
+        SuggestionRefresh.objects.all().delete()
+
+    def queued(self):
+        return sorted(SuggestionRefresh.objects.values_list('owner_id', flat=True))
+
+    def test_follow_queues_the_followers_of_the_owner(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Follower.objects.create(owner=self.users[0], followed=self.users[1])
+        self.assertEqual(
+            self.queued(), [self.users[0].pk, self.users[2].pk, self.users[3].pk]
+        )
+
+    @override_settings(SUGGESTIONS_MAX_QUEUED_FOLLOWERS=1)
+    def test_popular_owner_followers_are_not_loaded(self):
+        with mock.patch.object(graph, 'followers') as followers, \
+                self.captureOnCommitCallbacks(execute=True):
+            Follower.objects.create(owner=self.users[0], followed=self.users[1])
+        followers.assert_not_called()
+        self.assertEqual(self.queued(), [self.users[0].pk])
+
+
+# Deleting a user cascades to their Follower rows; the FOREIGN KEY checks of
+# SQLite are deferred to the commit, which TestCase never reaches
+class SuggestionRefreshDeleteTests(TransactionTestCase):
+    def test_delete_a_user_who_follows_someone(self):
+        follower = User.objects.create_user('follower', password='pass')
+        followed = User.objects.create_user('followed', password='pass')
+        Follower.objects.create(owner=follower, followed=followed)
+        SuggestionRefresh.objects.all().delete()
+
+        follower.delete()
+        self.assertFalse(User.objects.filter(pk=follower.pk).exists())
+        self.assertEqual(
+            list(SuggestionRefresh.objects.values_list('owner_id', flat=True)),
+            [],
+        )
+
+
+class SuggestionListTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.suggested = User.objects.create_user('suggested', password='pass')
+        self.other = User.objects.create_user('other', password='pass')
+        Suggestion.objects.create(
+            owner=self.owner, suggested=self.suggested, mutual_count=2
+        )
+        self.url = f'/profiles/{Profile.objects.get(owner=self.owner).pk}/suggestions/'
+
+    def test_owner_reads_their_suggestions(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['username'], row['mutual_count']) for row in response.data['results']],
+            [('suggested', 2)],
+        )
+
+    def test_anonymous_and_other_users_are_denied(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+# The filters answered from the follow graph cache answer as the joins
+# through Follower they replace
+class FollowFilterTests(APITestCase):
+    def setUp(self):
+        graph.clear()
+        self.users = [
+            User.objects.create_user(f'user{number}', password='pass')
+            for number in range(5)
+        ]
+        # The cached arrays are updated once the follows commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for owner, followed in [(0, 1), (0, 2), (1, 2), (2, 0), (3, 2), (3, 1)]:
+                Follower.objects.create(
+                    owner=self.users[owner], followed=self.users[followed]
+                )
+        for user in self.users:
+            Post.objects.create(owner=user, title=f'by {user.username}')
+        self.profiles = list(Profile.objects.order_by('owner_id'))
+
+    def tearDown(self):
+        graph.clear()
+
+    def listed(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['id'] for row in response.data['results'])
+
+    def joined(self, model, **lookups):
+        return sorted(model.objects.filter(**lookups).values_list('pk', flat=True))
+
+    def assert_filters_match_the_joins(self):
+        for profile in self.profiles:
+            for url, model, names in [
+                ('/profiles/', Profile, [
+                    'owner__following__followed__profile',
+                    'owner__followed__owner__profile',
+                ]),
+                ('/posts/', Post, ['owner__followed__owner__profile']),
+            ]:
+                for name in names:
+                    with self.subTest(url=url, name=name, profile=profile.pk):
+                        self.assertEqual(
+                            self.listed(url, **{name: profile.pk}),
+                            self.joined(model, **{name: profile}),
+                        )
+            # Both follow filters together: an intersection of the arrays
+            both = {
+                'owner__following__followed__profile': profile,
+                'owner__followed__owner__profile': profile,
+            }
+            expected = set(self.joined(Profile, **{
+                'owner__following__followed__profile': profile,
+            })) & set(self.joined(Profile, **{
+                'owner__followed__owner__profile': profile,
+            }))
+            with self.subTest(url='/profiles/', name='both', profile=profile.pk):
+                self.assertEqual(
+                    self.listed('/profiles/', **{
+                        name: value.pk for name, value in both.items()
+                    }),
+                    sorted(expected),
+                )
+
+    def test_filters_match_the_joins(self):
+        self.assert_filters_match_the_joins()
+
+    @override_settings(FOLLOW_GRAPH_MAX_IN_LIST=1)
+    def test_long_lists_fall_back_to_the_joins(self):
+        self.assert_filters_match_the_joins()
+
+    def test_follows_update_the_cached_arrays(self):
+        self.assert_filters_match_the_joins()
+        with self.captureOnCommitCallbacks(execute=True):
+            Follower.objects.create(owner=self.users[4], followed=self.users[0])
+            Follower.objects.get(owner=self.users[0], followed=self.users[1]).delete()
+        self.assert_filters_match_the_joins()
+
+
+class ProfileMutualsTests(APITestCase):
+    def setUp(self):
+        graph.clear()
+        self.viewer, self.target, *self.others = [
+            User.objects.create_user(f'user{number}', password='pass')
+            for number in range(6)
+        ]
+        first, second, third, stranger = self.others
+        with self.captureOnCommitCallbacks(execute=True):
+            for owner, followed in [
+                (self.viewer, first), (self.viewer, second), (self.viewer, third),
+                (first, self.target), (second, self.target),
+                (stranger, self.target),
+            ]:
+                Follower.objects.create(owner=owner, followed=followed)
+        self.url = f'/profiles/{self.target.profile.pk}/mutuals/'
+
+    def tearDown(self):
+        graph.clear()
+
+    def mutuals(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['count'], [row['username'] for row in response.data['results']]
+
+    def test_followed_accounts_that_follow_the_profile(self):
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.mutuals(), (2, ['user2', 'user3']))
+        self.assertEqual(self.mutuals(limit=1), (2, ['user2']))
+
+    @override_settings(FOLLOW_GRAPH_MAX_IN_LIST=1)
+    def test_followers_loaded_for_many_candidates(self):
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.mutuals(), (2, ['user2', 'user3']))
+
+    def test_anonymous_users_have_no_mutuals(self):
+        self.assertEqual(self.mutuals(), (0, []))
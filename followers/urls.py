@@ -4,4 +4,8 @@ from followers import views
 urlpatterns = [
     path('followers/', views.FollowerList.as_view()),
     path('followers/<int:pk>/', views.FollowerDetail.as_view()),
+    path('profiles/<int:pk>/follow/', views.ProfileFollow.as_view()),
+    path('profiles/<int:pk>/mutuals/', views.ProfileMutuals.as_view()),
+    path('profiles/<int:pk>/suggestions/', views.SuggestionList.as_view()),
+    path('follow-graph-stats/', views.follow_graph_stats),
 ]
\ No newline at end of file
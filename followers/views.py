@@ -1,14 +1,35 @@
-from .serializers import FollowerSerializer
-from .models import Follower
+from django.db.models import Exists, OuterRef
+from .serializers import (
+    FastFollowerSerializer, FollowerSerializer, ProfileFollowSerializer,
+    ProfileMutualsSerializer, SuggestionSerializer,
+)
+from .models import Follower, Suggestion
+from . import graph
+from drf_api.cache import AnonymousResponseCacheMixin
+from drf_api.fast import FastListMixin
+from drf_api.fieldsets import SparseFieldsetMixin
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.toggles import ToggleView
+from profiles.models import Profile
 from rest_framework import permissions, generics
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+
+# Everything a follower response is built from, see drf_api/cache.py
+FOLLOWER_CACHE_MODELS = ['followers.Follower', 'auth.User']
 
 
 # See full description in comments/views.py
-class FollowerList(generics.ListCreateAPIView):
+class FollowerList(
+    AnonymousResponseCacheMixin, FastListMixin, SparseFieldsetMixin,
+    generics.ListCreateAPIView
+):
+    cache_models = FOLLOWER_CACHE_MODELS
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     serializer_class = FollowerSerializer
-    queryset = Follower.objects.all()
+    fast_serializer_class = FastFollowerSerializer
+    queryset = Follower.objects.select_related('owner', 'followed')
 
 
     # See full description in comments/views.py, likes/views.py
@@ -17,10 +38,121 @@ class FollowerList(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class FollowerDetail(generics.RetrieveDestroyAPIView):
+
+class FollowerDetail(
+    AnonymousResponseCacheMixin, SparseFieldsetMixin,
+    generics.RetrieveDestroyAPIView
+):
+    cache_models = FOLLOWER_CACHE_MODELS
     permission_classes = [IsOwnerOrReadOnly]
     serializer_class = FollowerSerializer
-    queryset = Follower.objects.all()
+    queryset = Follower.objects.select_related('owner', 'followed')
+
+
+class ProfileFollow(ToggleView):
+    """
+    PUT follows the profile's owner, DELETE unfollows them. Both are
+    idempotent and keyed on (owner, followed), so unfollowing doesn't need
+    the Follower id, and both answer with the new counters.
+    """
+    queryset = Profile.objects.only('id', 'owner_id')
+    serializer_class = ProfileFollowSerializer
+    toggle_model = Follower
+    toggle_field = 'followed'
+    toggle_source = 'owner_id'
+
+    def get_response_data(self, profile, following_id):
+        # Both profiles' counters in one query
+        counts = {
+            owner_id: (followers_count, following_count)
+            for owner_id, followers_count, following_count in
+            Profile.objects.filter(
+                owner_id__in=[profile.owner_id, self.request.user.pk]
+            ).values_list('owner_id', 'followers_count', 'following_count')
+        }
+        return {
+            'profile': profile.pk,
+            'following_id': following_id,
+            'followers_count': counts[profile.owner_id][0],
+            # A user without a Profile row has no counters
+            'following_count': counts.get(self.request.user.pk, (0, 0))[1],
+        }
+
+
+class ProfileMutuals(generics.GenericAPIView):
+    """
+    "Followed by X, Y and 12 others you follow": the accounts the current
+    user follows that follow the profile's owner, as a count and the first
+    ?limit= of them (3 by default). Computed from the follow graph cache
+    (followers/graph.py), see graph.followers_among() for accounts with
+    many followers. Anonymous users follow nobody, so they get no mutuals.
+    """
+    queryset = Profile.objects.only('id', 'owner_id')
+    serializer_class = ProfileMutualsSerializer
+    default_limit = 3
+    max_limit = 50
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return max(0, min(limit, self.max_limit))
+
+    def get(self, request, *args, **kwargs):
+        profile = self.get_object()
+        mutual_ids = []
+        if request.user.is_authenticated:
+            mutual_ids = graph.followers_among(
+                profile.owner_id, graph.following(request.user.pk)
+            )
+        first = Profile.objects.filter(
+            owner_id__in=mutual_ids[:self.get_limit()]
+        ).order_by('owner_id').values('owner__username', 'id')
+        serializer = self.get_serializer({
+            'profile': profile.pk,
+            'count': len(mutual_ids),
+            'results': [
+                {'profile_id': row['id'], 'username': row['owner__username']}
+                for row in first
+            ],
+        })
+        return Response(serializer.data)
+
+
+class IsProfileOwner(permissions.BasePermission):
+    """The user owns the profile of the URL's <int:pk>."""
+    def has_permission(self, request, view):
+        return Profile.objects.filter(
+            pk=view.kwargs['pk'], owner_id=request.user.pk
+        ).exists()
+
+
+class SuggestionList(SparseFieldsetMixin, generics.ListAPIView):
+    """
+    "Who to follow" for the profile's owner, most mutual follows first,
+    precomputed by refresh_suggestions (followers/suggestions.py).
+    Accounts the owner followed since the last refresh are left out here.
+    Only the owner can read their suggestions.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsProfileOwner]
+    serializer_class = SuggestionSerializer
+    queryset = Suggestion.objects.select_related('suggested__profile')
+
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            ~Exists(Follower.objects.filter(
+                owner=OuterRef('owner'), followed=OuterRef('suggested')
+            )),
+            owner__profile=self.kwargs['pk'],
+        )
+
+
+# Size and hit rate of this worker's follow graph cache (followers/graph.py)
+@api_view()
+@permission_classes([permissions.IsAdminUser])
+def follow_graph_stats(request):
+    return Response(graph.get_stats())
 
 
 # When an authenticated user decides to follow another user and initiates a POST
@@ -0,0 +1,234 @@
+"""
+Write-behind buffer for likes (settings.LIKE_BUFFER_ENABLED).
+
+Under a viral post every like is an INSERT into the likes index plus an
+UPDATE of the same Post row, and the requests queue up on that row's lock.
+With the buffer, PUT/DELETE /posts/<pk>/like/ only record the intent in
+this process; a background thread writes the pending intents every
+LIKE_BUFFER_FLUSH_INTERVAL seconds:
+
+- intents are coalesced per (user, post), the last one wins, so a
+  like/unlike/like burst costs one row;
+- likes are inserted with one multi-row INSERT that skips existing ones,
+  unlikes deleted with one DELETE ... WHERE id IN (...);
+- intents for a post or a user that was deleted in the meantime are
+  dropped;
+- every touched post gets one UPDATE that recounts its likes_count inside
+  the statement, so concurrent flushes from other workers can't make it
+  drift, and its trending score is flagged for a refresh (for a recompute
+  if it lost a like).
+
+No per-like signals are sent, the response cache generations of Like and
+Post are bumped once per flush instead.
+
+Reads stay read-your-writes for the acting user: FlushPendingLikesMixin
+writes the user's own pending intents before any of their requests is
+handled. That only holds within one worker process; other users see a
+like once it is flushed. Pending intents are flushed at exit (atexit), so
+a graceful worker shutdown doesn't lose them.
+"""
+import atexit
+import logging
+import threading
+import time
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from drf_api.bulk import chunked, delete_pks, insert_rows
+from drf_api.cache import bump_generation
+from posts.models import (
+    Post, TrendingScore, count_subquery, mark_trending_recompute,
+)
+from .models import Like
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# (owner_id, post_id) -> (liked, time of the intent)
+_pending = {}
+# owner_id -> post_ids of their pending intents
+_pending_by_owner = {}
+# Held while a batch is written, and the owners in that batch, so that a
+# user's read waits for a flush in progress that took their intents
+_write_lock = threading.Lock()
+_writing_owners = set()
+_flusher = None
+
+
+def is_enabled():
+    return settings.LIKE_BUFFER_ENABLED
+
+
+def add(owner_id, post_id, liked):
+    """Queue a like (liked=True) or an unlike of the post by the user."""
+    with _lock:
+        _pending[owner_id, post_id] = (liked, timezone.now())
+        _pending_by_owner.setdefault(owner_id, set()).add(post_id)
+        full = len(_pending) >= settings.LIKE_BUFFER_MAX_PENDING
+    _start_flusher()
+    if full:
+        flush()
+
+
+def pending_count():
+    with _lock:
+        return len(_pending)
+
+
+def _take(owner_id=None):
+    with _lock:
+        if owner_id is None:
+            taken = dict(_pending)
+            _pending.clear()
+            _pending_by_owner.clear()
+        else:
+            taken = {
+                (owner_id, post_id): _pending.pop((owner_id, post_id))
+                for post_id in _pending_by_owner.pop(owner_id, ())
+            }
+    return taken
+
+
+def _requeue(intents):
+    # Put back the intents of a failed flush, unless a newer one came in
+    with _lock:
+        for (owner_id, post_id), intent in intents.items():
+            _pending.setdefault((owner_id, post_id), intent)
+            _pending_by_owner.setdefault(owner_id, set()).add(post_id)
+
+
+def existing_pks(model, pks):
+    found = set()
+    for batch in chunked(sorted(pks), 500):
+        found.update(model.objects.filter(pk__in=batch).values_list('pk', flat=True))
+    return found
+
+
+def write(intents):
+    """Write a {(owner_id, post_id): (liked, time)} batch of intents."""
+    unlikes = [key for key, (liked, created_at) in intents.items() if not liked]
+    post_ids = sorted({post_id for owner_id, post_id in intents})
+
+    with transaction.atomic():
+        # ignore_conflicts only skips duplicates: a like of a post or by a
+        # user deleted since it was queued would fail the foreign keys, or
+        # bring back the like the cascade deleted
+        likes = [
+            (owner_id, post_id, created_at)
+            for (owner_id, post_id), (liked, created_at) in intents.items() if liked
+        ]
+        if likes:
+            post_pks = existing_pks(Post, {post_id for _, post_id, _ in likes})
+            owner_pks = existing_pks(User, {owner_id for owner_id, _, _ in likes})
+            dropped = len(likes)
+            likes = [
+                like for like in likes
+                if like[0] in owner_pks and like[1] in post_pks
+            ]
+            dropped -= len(likes)
+            if dropped:
+                logger.info('Dropped %d queued like(s) of deleted posts or users', dropped)
+        insert_rows(Like, ('owner', 'post', 'created_at'), likes, ignore_conflicts=True)
+        unliked_ids = set()
+        for batch in chunked(unlikes, 200):
+            deleted = list(Like.objects.filter(reduce(or_, (
+                Q(owner_id=owner_id, post_id=post_id)
+                for owner_id, post_id in batch
+            ))).values_list('pk', 'post_id'))
+            delete_pks(Like, [pk for pk, post_id in deleted])
+            unliked_ids.update(post_id for pk, post_id in deleted)
+        # A deleted like is taken out of the trending score by recomputing it
+        for batch in chunked(sorted(unliked_ids), 500):
+            mark_trending_recompute(batch)
+        for batch in chunked(post_ids, 500):
+            Post.objects.filter(pk__in=batch).update(likes_count=count_subquery(Like))
+            TrendingScore.objects.filter(post_id__in=batch, dirty=False).update(
+                dirty=True
+            )
+    bump_generation(Like)
+    bump_generation(Post)
+
+
+def _write_each(intents):
+    items = list(intents.items())
+    for index, (key, intent) in enumerate(items):
+        try:
+            write({key: intent})
+        except IntegrityError:
+            logger.warning('Dropped the queued like intent %s: %s', key, intent)
+        except Exception:
+            # Put back this intent and the ones not tried yet
+            _requeue(dict(items[index:]))
+            raise
+
+
+def flush(owner_id=None):
+    """Write the pending intents (only the user's, if owner_id is given)."""
+    if owner_id is not None:
+        with _lock:
+            if owner_id not in _pending_by_owner and owner_id not in _writing_owners:
+                # The common case on reads: nothing to wait for
+                return 0
+    with _write_lock:
+        intents = _take(owner_id)
+        if not intents:
+            return 0
+        with _lock:
+            _writing_owners.update(owner for owner, post in intents)
+        try:
+            write(intents)
+        except IntegrityError:
+            # A post or user deleted while the batch was written: write the
+            # intents one by one and drop the ones that can't be. This
+            # requeues what it couldn't try if it fails
+            _write_each(intents)
+        except Exception:
+            _requeue(intents)
+            raise
+        finally:
+            with _lock:
+                _writing_owners.clear()
+    return len(intents)
+
+
+def _run():
+    while True:
+        time.sleep(settings.LIKE_BUFFER_FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Flushing the like buffer failed, will retry')
+        finally:
+            # The thread has its own database connection
+            connection.close()
+
+
+def _start_flusher():
+    global _flusher
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run, name='like-buffer', daemon=True)
+            _flusher.start()
+            atexit.register(flush)
+
+
+class FlushPendingLikesMixin:
+    """
+    Write the current user's pending likes before handling their request,
+    so they see their own likes and counts right away.
+    """
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if is_enabled() and request.user.is_authenticated:
+            try:
+                flush(request.user.pk)
+            except Exception:
+                # The intents are put back for the background flush; the
+                # request goes on without the user's latest likes
+                logger.exception('Flushing the likes of user %s failed', request.user.pk)
@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
-from posts.models import Post
+from posts.models import Post, mark_trending_deleted, mark_trending_dirty
+from drf_api.cache import bump_generation
 
 class Like(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -21,6 +24,8 @@ class Like(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        # Keyset (cursor) pagination on (created_at, id), see drf_api/pagination.py
+        indexes = [models.Index(fields=['-created_at', '-id'])]
         # unique_together: This is a model option that's used inside the Meta class
         # of a Django model. It's a list or tuple of lists/tuples that specifies the
         # combination of fields that must be unique when considered together.
@@ -36,3 +41,30 @@ class Like(models.Model):
     def __str__(self):
         return f"{self.owner} {self.post}"
 
+
+# Keep Post.likes_count in step with the Like rows. The update is a single
+# UPDATE ... SET likes_count = likes_count + 1 statement, so concurrent likes
+# on the same post can't overwrite each other's increments.
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            likes_count=F('likes_count') + 1
+        )
+
+
+def decrement_likes_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(
+        likes_count=F('likes_count') - 1
+    )
+
+
+post_save.connect(increment_likes_count, sender=Like)
+post_delete.connect(decrement_likes_count, sender=Like)
+
+# Likes change the post's trending score (posts/trending.py)
+post_save.connect(mark_trending_dirty, sender=Like)
+post_delete.connect(mark_trending_deleted, sender=Like)
+
+# Invalidate the cached anonymous responses built from Likes (drf_api/cache.py)
+post_save.connect(bump_generation, sender=Like)
+post_delete.connect(bump_generation, sender=Like)
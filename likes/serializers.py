@@ -1,10 +1,14 @@
 from django.db import IntegrityError
 from rest_framework import serializers
+from drf_api.fast import DateTime, FastSerializer, Method, Value
+from drf_api.fieldsets import SparseFieldsetSerializerMixin
 from .models import Like
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     post_info = serializers.SerializerMethodField()
+    # Relations read by the method fields, see drf_api/checks.py
+    related_sources = ['post.owner.username', 'post.title']
 
     def get_post_info(self, obj):
         return {
@@ -46,4 +50,32 @@ class LikeSerializer(serializers.ModelSerializer):
             # might be a duplicate (i.e., the user has already liked the post).
             raise serializers.ValidationError({
                 'detail': 'possible duplicate',
-            })
\ No newline at end of file
+            })
+
+class PostLikeSerializer(serializers.Serializer):
+    """
+    Response of PUT/DELETE /posts/<pk>/like/: the current user's like of the
+    post (null once unliked) and the post's new likes_count. With the like
+    buffer on (likes/buffer.py) the change is only queued: pending is true,
+    like_id is null and likes_count doesn't include it yet.
+    """
+    post = serializers.IntegerField(read_only=True)
+    like_id = serializers.IntegerField(read_only=True, allow_null=True)
+    likes_count = serializers.IntegerField(read_only=True)
+    pending = serializers.BooleanField(read_only=True, default=False)
+
+
+def post_info(row):
+    return {'username': row['post__owner__username'], 'title': row['post__title']}
+
+
+class FastLikeSerializer(FastSerializer):
+    """LikeSerializer for list responses, see drf_api/fast.py."""
+    serializer_class = LikeSerializer
+    fields = {
+        'id': Value('id'),
+        'created_at': DateTime('created_at'),
+        'owner': Value('owner__username'),
+        'post': Value('post'),
+        'post_info': Method(post_info, 'post__owner__username', 'post__title'),
+    }
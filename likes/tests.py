@@ -1,3 +1,156 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import IntegrityError, OperationalError
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from drf_api import toggles
+from posts.models import Post, TrendingScore
+from . import buffer
+from .models import Like
+
+
+class PostLikeTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('liker', password='pass')
+        owner = User.objects.create_user('owner', password='pass')
+        self.post = Post.objects.create(owner=owner, title='title')
+        self.url = f'/posts/{self.post.pk}/like/'
+        self.client.force_authenticate(self.user)
+
+    def test_put_and_delete_are_idempotent(self):
+        response = self.client.put(self.url)
+        self.assertEqual(response.status_code, 201)
+        like_id = response.data['like_id']
+        self.assertEqual(response.data['likes_count'], 1)
+
+        response = self.client.put(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['like_id'], like_id)
+        self.assertEqual(response.data['likes_count'], 1)
+        self.assertEqual(Like.objects.count(), 1)
+
+        for _ in range(2):
+            response = self.client.delete(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNone(response.data['like_id'])
+            self.assertEqual(response.data['likes_count'], 0)
+        self.assertFalse(Like.objects.exists())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_put_racing_a_delete_answers_the_current_state(self):
+        Like.objects.create(owner=self.user, post=self.post)
+
+        # The INSERT finds the like, which another request deletes before
+        # its id is read
+        def conflict_then_delete(model, **values):
+            Like.objects.filter(owner=self.user, post=self.post).delete()
+
+        with mock.patch.object(toggles, 'insert_or_ignore', conflict_then_delete):
+            response = self.client.put(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['like_id'])
+        self.assertEqual(response.data['likes_count'], 0)
+
+    def test_anonymous_users_cant_like(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.put(self.url).status_code, 403)
+
+
+@override_settings(LIKE_BUFFER_ENABLED=True)
+@mock.patch.object(buffer, '_start_flusher')
+class LikeBufferTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('liker', password='pass')
+        owner = User.objects.create_user('owner', password='pass')
+        self.post = Post.objects.create(owner=owner, title='kept')
+        self.deleted_post = Post.objects.create(owner=owner, title='deleted')
+        self.addCleanup(buffer._take)
+
+    def test_flush_drops_likes_of_deleted_posts(self, start_flusher):
+        buffer.add(self.user.pk, self.deleted_post.pk, True)
+        buffer.add(self.user.pk, self.post.pk, True)
+        self.deleted_post.delete()
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(buffer.pending_count(), 0)
+        self.assertEqual(
+            list(Like.objects.values_list('post_id', flat=True)), [self.post.pk]
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_flushed_unlike_flags_the_trending_score_for_a_recompute(self, start_flusher):
+        Like.objects.create(owner=self.user, post=self.post)
+        TrendingScore.objects.filter(post=self.post).update(dirty=False)
+        buffer.add(self.user.pk, self.post.pk, False)
+        buffer.flush()
+        score = TrendingScore.objects.get(post=self.post)
+        self.assertTrue(score.dirty)
+        self.assertTrue(score.recompute)
+
+    def test_failed_flush_doesnt_fail_the_request(self, start_flusher):
+        buffer.add(self.user.pk, self.post.pk, True)
+        self.client.force_authenticate(self.user)
+        with mock.patch.object(buffer, 'write', side_effect=OperationalError), \
+                self.assertLogs(buffer.logger, 'ERROR'):
+            response = self.client.get('/likes/')
+        self.assertEqual(response.status_code, 200)
+        # Put back for the next flush
+        self.assertEqual(buffer.pending_count(), 1)
+
+    def test_failed_retry_requeues_the_intents_not_written(self, start_flusher):
+        other_post = Post.objects.create(owner=self.post.owner, title='other')
+        buffer.add(self.user.pk, self.post.pk, True)
+        buffer.add(self.user.pk, other_post.pk, True)
+        buffer.add(self.user.pk, self.deleted_post.pk, False)
+        # The batch, then one by one: the first intent is written, the
+        # second fails
+        side_effect = [IntegrityError, None, OperationalError]
+        with mock.patch.object(buffer, 'write', side_effect=side_effect):
+            with self.assertRaises(OperationalError):
+                buffer.flush()
+        self.assertEqual(
+            sorted(buffer._take()),
+            sorted([
+                (self.user.pk, other_post.pk), (self.user.pk, self.deleted_post.pk)
+            ]),
+        )
+
+
+@override_settings(LIKE_BUFFER_ENABLED=True)
+@mock.patch.object(buffer, '_start_flusher')
+class LikeBufferRaceTests(TransactionTestCase):
+    # Foreign keys are only checked when the flush's transaction commits
+    def setUp(self):
+        self.user = User.objects.create_user('liker', password='pass')
+        owner = User.objects.create_user('owner', password='pass')
+        self.post = Post.objects.create(owner=owner, title='kept')
+        self.deleted_post = Post.objects.create(owner=owner, title='deleted')
+        self.addCleanup(buffer._take)
+
+    def test_flush_drops_intents_failing_foreign_keys(self, start_flusher):
+        # The post is deleted by another worker after the existence check
+        buffer.add(self.user.pk, self.deleted_post.pk, True)
+        buffer.add(self.user.pk, self.post.pk, True)
+        deleted_pk = self.deleted_post.pk
+        self.deleted_post.delete()
+        existing_pks = buffer.existing_pks
+
+        def stale_existing_pks(model, pks):
+            found = existing_pks(model, pks)
+            return found | {deleted_pk} if model is Post else found
+
+        with mock.patch.object(buffer, 'existing_pks', stale_existing_pks), \
+                self.assertLogs(buffer.logger, 'WARNING') as logs:
+            buffer.flush()
+        self.assertIn(
+            f'Dropped the queued like intent ({self.user.pk}, {deleted_pk})',
+            logs.output[0],
+        )
+        self.assertEqual(buffer.pending_count(), 0)
+        self.assertEqual(
+            list(Like.objects.values_list('post_id', flat=True)), [self.post.pk]
+        )
@@ -1,13 +1,29 @@
-from rest_framework import permissions, generics
+from rest_framework import permissions, generics, status
+from rest_framework.response import Response
+from drf_api.cache import AnonymousResponseCacheMixin
+from drf_api.fast import FastListMixin
+from drf_api.fieldsets import SparseFieldsetMixin
 from drf_api.permissions import IsOwnerOrReadOnly
-from .serializers import LikeSerializer
+from drf_api.toggles import ToggleView
+from posts.models import Post
+from . import buffer
+from .serializers import FastLikeSerializer, LikeSerializer, PostLikeSerializer
 from .models import Like
 
 
+# Everything a like response is built from, see drf_api/cache.py
+LIKE_CACHE_MODELS = ['likes.Like', 'posts.Post', 'auth.User']
+
+
 # See full description in comments/views.py
-class LikeList(generics.ListCreateAPIView):
-    queryset = Like.objects.all()
+class LikeList(
+    buffer.FlushPendingLikesMixin, AnonymousResponseCacheMixin, FastListMixin,
+    SparseFieldsetMixin, generics.ListCreateAPIView
+):
+    cache_models = LIKE_CACHE_MODELS
+    queryset = Like.objects.select_related('owner', 'post__owner')
     serializer_class = LikeSerializer
+    fast_serializer_class = FastLikeSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     # The primary purpose of overriding perform_create is to add custom behavior
@@ -22,7 +38,47 @@ class LikeList(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class LikeDetail(generics.RetrieveDestroyAPIView):
-    queryset = Like.objects.all()
+class LikeDetail(
+    buffer.FlushPendingLikesMixin, AnonymousResponseCacheMixin,
+    SparseFieldsetMixin, generics.RetrieveDestroyAPIView
+):
+    cache_models = LIKE_CACHE_MODELS
+    queryset = Like.objects.select_related('owner', 'post__owner')
     serializer_class = LikeSerializer
     permission_classes = [IsOwnerOrReadOnly]
+
+
+class PostLike(ToggleView):
+    """
+    PUT likes the post, DELETE unlikes it. Both are idempotent, so a double
+    tap doesn't fail, and answer with the like id and the new likes_count.
+    With LIKE_BUFFER_ENABLED the like is queued and written in the next
+    batch instead (likes/buffer.py), and the answer is 202 Accepted.
+    """
+    queryset = Post.objects.only('id')
+    serializer_class = PostLikeSerializer
+    toggle_model = Like
+    toggle_field = 'post'
+
+    def get_response_data(self, post, like_id):
+        likes_count = Post.objects.filter(pk=post.pk).values_list(
+            'likes_count', flat=True
+        ).get()
+        return {'post': post.pk, 'like_id': like_id, 'likes_count': likes_count}
+
+    def queue(self, request, liked):
+        post = self.get_object()
+        buffer.add(request.user.pk, post.pk, liked)
+        data = self.get_response_data(post, None)
+        data['pending'] = True
+        return Response(self.get_serializer(data).data, status=status.HTTP_202_ACCEPTED)
+
+    def put(self, request, *args, **kwargs):
+        if buffer.is_enabled():
+            return self.queue(request, liked=True)
+        return super().put(request, *args, **kwargs)
+
+    def delete(self, request, *args, **kwargs):
+        if buffer.is_enabled():
+            return self.queue(request, liked=False)
+        return super().delete(request, *args, **kwargs)
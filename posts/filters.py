@@ -0,0 +1,30 @@
+from followers import graph
+from followers.filters import FollowFilter, FollowFilterSet
+from .models import Post
+
+
+class PostFilter(FollowFilterSet):
+    # showing posts that are owned by users that a particular user is
+    # following, i.e. getting the user post feed by their profile id
+    owner__followed__owner__profile = FollowFilter(
+        graph.FOLLOWING, field_name='owner__followed__owner__profile',
+    )
+
+    class Meta:
+        model = Post
+        fields = [
+            'owner__followed__owner__profile',
+            # liked by a particular user - returns all the posts a user with
+            # a given id liked
+            # 1) 'likes': This is the related_name for the ForeignKey relationship from the Like
+            # model to the Post model. It represents the connection from a post to all the
+            # like objects associated with it
+            # 2) '__': In Django's query language, double underscores are used to access related
+            # fields or to apply filters on fields of related models.
+            # 3) 'owner': This is a field in the Like model, which is a ForeignKey to the User
+            # model. It indicates the user who created the like.
+            'likes__owner__profile', # CI suggestion
+            # 'likes__owner', # my suggestion
+            # owned by a particular user
+            'owner__profile',
+        ]
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import index_posts, is_supported
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of all posts.'
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            self.stdout.write('This database has no full-text search index')
+            return
+        index_posts()
+        self.stdout.write(self.style.SUCCESS('Rebuilt the post search index'))
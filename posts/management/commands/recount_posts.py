@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from comments.models import Comment
+from likes.models import Like
+from posts.models import Post, count_subquery
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the denormalized Post.likes_count and Post.comments_count '
+        'counters and repair the posts whose stored values have drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report the posts whose counters have drifted.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of posts repaired per UPDATE statement.',
+        )
+
+    def handle(self, *args, **options):
+        drifted = Post.objects.annotate(
+            actual_likes=count_subquery(Like),
+            actual_comments=count_subquery(Comment),
+        ).exclude(
+            likes_count=F('actual_likes'),
+            comments_count=F('actual_comments'),
+        ).order_by('pk').values_list('pk', flat=True)
+        drifted = list(drifted)
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted)} post(s) have drifted counters')
+            return
+
+        batch_size = options['batch_size']
+        for start in range(0, len(drifted), batch_size):
+            # The counts are recomputed inside the UPDATE itself, so a like or
+            # comment created while the command runs is not lost.
+            Post.objects.filter(pk__in=drifted[start:start + batch_size]).update(
+                likes_count=count_subquery(Like),
+                comments_count=count_subquery(Comment),
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired the counters of {len(drifted)} post(s)'
+        ))
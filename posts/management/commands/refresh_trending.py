@@ -0,0 +1,142 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.utils import timezone
+
+from comments.models import Comment
+from drf_api.bulk import chunked
+from likes.models import Like
+from posts.models import Post, TrendingScore
+from posts.trending import (
+    COMMENT_WEIGHT, LIKE_WEIGHT, POST_WEIGHT, logaddexp, trending_score,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Update the trending score of the posts liked or commented on since '
+        'the last run with their new events, and recompute the posts that '
+        'lost one (see posts/trending.py). Run it periodically, '
+        'e.g. from cron, or keep it running with --every.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute every post, e.g. after bulk-loading likes.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of posts recomputed per round of queries.',
+        )
+        parser.add_argument(
+            '--every', type=float, metavar='SECONDS',
+            help='Keep running, refreshing every SECONDS.',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            self.flag_all()
+        while True:
+            started = time.perf_counter()
+            refreshed = self.refresh(options['batch_size'])
+            self.stdout.write(
+                f'Refreshed the trending score of {refreshed} post(s) in '
+                f'{time.perf_counter() - started:.2f}s'
+            )
+            if not options['every']:
+                return
+            time.sleep(options['every'])
+
+    def flag_all(self):
+        # Posts inserted without signals (e.g. by generate_data) have no row
+        missing = Post.objects.filter(trending_score__isnull=True).values_list(
+            'pk', 'created_at'
+        )
+        TrendingScore.objects.bulk_create([
+            TrendingScore(
+                post_id=pk, score=trending_score([(POST_WEIGHT, created_at)])
+            )
+            for pk, created_at in missing.iterator()
+        ], batch_size=1000, ignore_conflicts=True)
+        # Rows loaded without signals can be older than the scores
+        TrendingScore.objects.update(dirty=True, recompute=True)
+
+    def refresh(self, batch_size):
+        refreshed = 0
+        # Posts with events too recent to be added yet, flagged again for
+        # the next run
+        waiting = set()
+        while True:
+            flagged = list(TrendingScore.objects.filter(dirty=True).exclude(
+                post_id__in=waiting
+            ).values_list('post_id', 'score', 'recompute')[:batch_size])
+            if not flagged:
+                break
+            # post_id -> stored score, of the posts that only got new events
+            scores = {
+                post_id: score
+                for post_id, score, recompute in flagged if not recompute
+            }
+            recompute_ids = [
+                post_id for post_id, _, recompute in flagged if recompute
+            ]
+            # Cleared before the events are read: a like that comes in while
+            # the scores are computed flags its post again for the next run.
+            # A post flagged for a recompute in the meantime keeps its flags.
+            TrendingScore.objects.filter(
+                post_id__in=list(scores), recompute=False
+            ).update(dirty=False)
+            TrendingScore.objects.filter(post_id__in=recompute_ids).update(
+                dirty=False, recompute=False
+            )
+            # The scores take in the events until `until`: a like or comment
+            # can be committed a little after its created_at (e.g. by the
+            # like buffer, likes/buffer.py), and the next run only reads the
+            # events created after it
+            until = timezone.now() - timedelta(seconds=settings.TRENDING_EVENT_DELAY)
+
+            events = defaultdict(list)
+            posts = Post.objects.filter(pk__in=recompute_ids).values_list(
+                'pk', 'created_at'
+            )
+            for pk, created_at in posts:
+                events[pk].append((POST_WEIGHT, created_at))
+            for model, weight in ((Like, LIKE_WEIGHT), (Comment, COMMENT_WEIGHT)):
+                rows = model.objects.filter(
+                    Q(post_id__in=recompute_ids) | Q(
+                        post_id__in=list(scores),
+                        created_at__gt=F('post__trending_score__updated_at'),
+                    ),
+                ).order_by().values_list('post_id', 'created_at')
+                for post_id, created_at in rows.iterator():
+                    if created_at > until:
+                        waiting.add(post_id)
+                    else:
+                        events[post_id].append((weight, created_at))
+
+            updated = [
+                (post_id, trending_score(events[post_id]))
+                for post_id in recompute_ids if post_id in events
+            ]
+            # A post without new events keeps its score, and the time it
+            # covers
+            updated.extend(
+                (post_id, logaddexp(score, trending_score(events[post_id])))
+                for post_id, score in scores.items() if post_id in events
+            )
+            TrendingScore.objects.bulk_update([
+                TrendingScore(post_id=post_id, score=score, updated_at=until)
+                for post_id, score in updated
+            ], ['score', 'updated_at'])
+            refreshed += len(flagged)
+
+        for batch in chunked(sorted(waiting), batch_size):
+            TrendingScore.objects.filter(post_id__in=batch, dirty=False).update(
+                dirty=True
+            )
+        return refreshed
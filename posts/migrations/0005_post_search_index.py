@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# The SQL is spelled out here rather than imported from posts/search.py, so
+# that later changes to that module don't change what this migration does
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE TABLE posts_post_search ('
+            ' post_id bigint PRIMARY KEY'
+            ' REFERENCES posts_post (id) ON DELETE CASCADE'
+            ' DEFERRABLE INITIALLY DEFERRED,'
+            ' document tsvector NOT NULL)'
+        )
+        schema_editor.execute(
+            'CREATE INDEX posts_post_search_document_idx'
+            ' ON posts_post_search USING gin (document)'
+        )
+        schema_editor.execute(
+            'INSERT INTO posts_post_search (post_id, document)'
+            " SELECT p.id, setweight(to_tsvector('simple', p.title), 'A') ||"
+            " setweight(to_tsvector('simple', u.username), 'A') ||"
+            " setweight(to_tsvector('simple', p.content), 'B')"
+            ' FROM posts_post p JOIN auth_user u ON u.id = p.owner_id'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE posts_post_fts USING fts5('
+            "title, content, username, tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            'INSERT INTO posts_post_fts (rowid, title, content, username)'
+            ' SELECT p.id, p.title, p.content, u.username'
+            ' FROM posts_post p JOIN auth_user u ON u.id = p.owner_id'
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_post_search')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
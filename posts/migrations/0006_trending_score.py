@@ -0,0 +1,52 @@
+# Generated by Django 3.2.23 on 2026-10-17 19:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from posts.trending import POST_WEIGHT, trending_score
+
+
+def create_scores(apps, schema_editor):
+    # Every post starts from the score of its creation and is flagged for
+    # `manage.py refresh_trending` to add its likes and comments
+    Post = apps.get_model('posts', 'Post')
+    TrendingScore = apps.get_model('posts', 'TrendingScore')
+    posts = Post.objects.order_by().values_list('pk', 'created_at')
+    batch = []
+    for pk, created_at in posts.iterator():
+        batch.append(TrendingScore(
+            post_id=pk, score=trending_score([(POST_WEIGHT, created_at)]),
+            dirty=True,
+        ))
+        if len(batch) == 1000:
+            TrendingScore.objects.bulk_create(batch)
+            batch = []
+    TrendingScore.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='posts.post')),
+                ('score', models.FloatField()),
+                ('dirty', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['-score'], name='posts_trending_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(condition=models.Q(('dirty', True)), fields=['post'], name='posts_trending_dirty_idx'),
+        ),
+        migrations.RunPython(create_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.23 on 2026-10-17 20:33
+
+from django.db import migrations, models
+
+
+def flag_dirty_scores(apps, schema_editor):
+    # The rows that are still dirty were flagged for a full recompute, e.g.
+    # by 0006, which only scored the posts' creation
+    TrendingScore = apps.get_model('posts', 'TrendingScore')
+    TrendingScore.objects.filter(dirty=True).update(recompute=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_trending_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendingscore',
+            name='recompute',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(flag_dirty_scores, migrations.RunPython.noop),
+    ]
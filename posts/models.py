@@ -1,5 +1,13 @@
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
+from profiles.models import Profile
+from drf_api.cache import bump_generation
+from drf_api.media import forget_image
+from .search import index_posts, unindex_post
+from .trending import POST_WEIGHT, trending_score
 
 
 class Post(models.Model):
@@ -41,9 +49,143 @@ class Post(models.Model):
     image_filter = models.CharField(
         max_length=32, choices=image_filter_choices, default='normal'
     )
+    # Denormalized counters. They are kept up to date with atomic F()
+    # increments by the Like and Comment signal receivers (likes/models.py,
+    # comments/models.py), so listing and ordering posts doesn't need to
+    # aggregate the likes and comments tables. Any drift can be repaired with
+    # `python manage.py recount_posts`.
+    likes_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
 
     class Meta:
         ordering = ['-created_at']
+        # Keyset (cursor) pagination on (created_at, id), see drf_api/pagination.py
+        indexes = [models.Index(fields=['-created_at', '-id'])]
 
     def __str__(self):
         return f'{self.id} {self.title}'
+
+
+class TrendingScore(models.Model):
+    """
+    Precomputed trending score of a post (see posts/trending.py). The Like
+    and Comment signal receivers flag the row as dirty, and
+    `python manage.py refresh_trending` updates the dirty rows.
+    """
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True, related_name='trending_score'
+    )
+    score = models.FloatField()
+    dirty = models.BooleanField(default=False)
+    # An event was deleted since `score` was computed: the refresh
+    # recomputes it from every event instead of adding the new ones
+    recompute = models.BooleanField(default=False)
+    # The score covers the events created until then
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # ?ordering=-trending reads the top of this index
+            models.Index(fields=['-score'], name='posts_trending_score_idx'),
+            # The refresh only looks for the few dirty rows
+            models.Index(
+                fields=['post'], name='posts_trending_dirty_idx',
+                condition=models.Q(dirty=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} {self.score}'
+
+
+def count_subquery(model):
+    # COUNT(*) of the model's rows pointing at the outer post, 0 if none.
+    # Used to recompute likes_count/comments_count inside an UPDATE.
+    return Coalesce(Subquery(
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by().values('post').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+# Keep Profile.posts_count in step with the owner's Post rows,
+# see likes/models.py for how the counters are updated.
+def increment_posts_count(sender, instance, created, **kwargs):
+    if created:
+        Profile.objects.filter(owner_id=instance.owner_id).update(
+            posts_count=F('posts_count') + 1
+        )
+
+
+def decrement_posts_count(sender, instance, **kwargs):
+    Profile.objects.filter(owner_id=instance.owner_id).update(
+        posts_count=F('posts_count') - 1
+    )
+
+
+post_save.connect(increment_posts_count, sender=Post)
+post_delete.connect(decrement_posts_count, sender=Post)
+
+
+# A new post starts with the score of its own creation; likes and comments
+# only flag the score for the next refresh_trending run. The UPDATE skips
+# rows that are already dirty, so the likes of a viral post don't all
+# write the same row.
+def create_trending_score(sender, instance, created, **kwargs):
+    if created:
+        TrendingScore.objects.create(
+            post=instance,
+            score=trending_score([(POST_WEIGHT, instance.created_at)]),
+        )
+
+
+def mark_trending_dirty(sender, instance, created, **kwargs):
+    # Connected to the Like and Comment post_save signals (new rows only),
+    # in likes/models.py and comments/models.py
+    if created:
+        TrendingScore.objects.filter(post_id=instance.post_id, dirty=False).update(
+            dirty=True
+        )
+
+
+def mark_trending_recompute(post_ids):
+    """Flag the scores of posts that lost an event for a full recompute."""
+    TrendingScore.objects.filter(post_id__in=post_ids).exclude(
+        dirty=True, recompute=True
+    ).update(dirty=True, recompute=True)
+
+
+def mark_trending_deleted(sender, instance, **kwargs):
+    # Connected to the Like and Comment post_delete signals
+    mark_trending_recompute([instance.post_id])
+
+
+post_save.connect(create_trending_score, sender=Post)
+
+
+# Keep the full-text search index (posts/search.py) up to date. A post is
+# reindexed whenever it's saved, and all of a user's posts are reindexed when
+# their username may have changed.
+def update_search_index(sender, instance, **kwargs):
+    index_posts('p.id = %s', [instance.pk])
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+
+
+def reindex_owner_posts(sender, instance, created, update_fields, **kwargs):
+    if not created and (update_fields is None or 'username' in update_fields):
+        index_posts('p.owner_id = %s', [instance.pk])
+
+
+post_save.connect(update_search_index, sender=Post)
+post_delete.connect(remove_from_search_index, sender=Post)
+post_save.connect(reindex_owner_posts, sender=User)
+
+# Invalidate the cached anonymous responses built from Posts (drf_api/cache.py)
+post_save.connect(bump_generation, sender=Post)
+post_delete.connect(bump_generation, sender=Post)
+
+# Forget the memoized URL of the image (drf_api/media.py)
+post_save.connect(forget_image, sender=Post)
+post_delete.connect(forget_image, sender=Post)
@@ -0,0 +1,149 @@
+"""
+Full-text search over the title and content of posts and the username of
+their owner, used by PostList's ?search= parameter.
+
+- PostgreSQL: a posts_post_search table holding one tsvector per post,
+  with a GIN index.
+- SQLite (DEV=1): an FTS5 virtual table, posts_post_fts, whose rowid is
+  the post id.
+
+Both are created by migration 0005. The index is updated incrementally by
+the Post and User signal receivers in posts/models.py and can be rebuilt
+with `python manage.py rebuild_post_search_index`.
+On any other database PostSearchFilter falls back to DRF's SearchFilter.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+# Words are indexed without stemming (the 'simple' configuration and the
+# unicode61 tokenizer) so that prefix matching of a partly typed word behaves
+# the same way on both databases. Title and username matches rank above
+# content matches.
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', p.title), 'A') || "
+    "setweight(to_tsvector('simple', u.username), 'A') || "
+    "setweight(to_tsvector('simple', p.content), 'B')"
+)
+SQLITE_WEIGHTS = '10.0, 1.0, 10.0'  # title, content, username
+
+MAX_TERMS = 16
+
+
+def is_supported():
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def index_posts(where='1 = 1', params=()):
+    """
+    (Re)index the posts matching `where`, an SQL condition on the posts_post
+    table aliased as p, in a single statement.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'INSERT INTO posts_post_search (post_id, document)'
+                f' SELECT p.id, {POSTGRES_DOCUMENT}'
+                ' FROM posts_post p JOIN auth_user u ON u.id = p.owner_id'
+                f' WHERE {where}'
+                ' ON CONFLICT (post_id) DO UPDATE'
+                ' SET document = EXCLUDED.document',
+                params,
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                'DELETE FROM posts_post_fts WHERE rowid IN'
+                f' (SELECT p.id FROM posts_post p WHERE {where})',
+                params,
+            )
+            cursor.execute(
+                'INSERT INTO posts_post_fts (rowid, title, content, username)'
+                ' SELECT p.id, p.title, p.content, u.username'
+                ' FROM posts_post p JOIN auth_user u ON u.id = p.owner_id'
+                f' WHERE {where}',
+                params,
+            )
+
+
+def unindex_post(post_id):
+    # posts_post_search rows are removed by ON DELETE CASCADE on PostgreSQL
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM posts_post_fts WHERE rowid = %s', [post_id]
+            )
+
+
+def search_terms(query):
+    # Only keep the words of the query, so that it can't inject FTS5 or
+    # tsquery operators
+    return re.findall(r'\w+', query)[:MAX_TERMS]
+
+
+def search_expressions(terms):
+    """
+    Return the (match, rank) subqueries for the search terms. Every term
+    must match; the last one is matched as a prefix so that results show
+    up while the user is still typing.
+    """
+    if connection.vendor == 'postgresql':
+        query = ' & '.join(terms) + ':*'
+        match = RawSQL(
+            'SELECT post_id FROM posts_post_search'
+            " WHERE document @@ to_tsquery('simple', %s)",
+            [query],
+        )
+        # ts_rank() is a real: as a double precision, the rank the cursor
+        # pagination reads back compares equal to the row's own
+        rank = RawSQL(
+            "SELECT ts_rank(s.document, to_tsquery('simple', %s))::float8"
+            ' FROM posts_post_search s WHERE s.post_id = posts_post.id',
+            [query],
+        )
+    else:
+        query = ' '.join(f'"{term}"' for term in terms) + '*'
+        match = RawSQL(
+            'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s',
+            [query],
+        )
+        # bm25() is lower for better matches
+        rank = RawSQL(
+            f'SELECT -bm25(posts_post_fts, {SQLITE_WEIGHTS})'
+            ' FROM posts_post_fts'
+            ' WHERE posts_post_fts MATCH %s AND rowid = posts_post.id',
+            [query],
+        )
+    return match, rank
+
+
+class PostSearchFilter(filters.SearchFilter):
+    """
+    Relevance-ranked full-text search backed by the index above. Results are
+    ordered by relevance unless the client asks for an explicit ?ordering=.
+    The cursor pagination (?pagination=cursor, drf_api/pagination.py) reads
+    that ordering from get_ordering() and keys its cursor on the rank.
+    """
+    relevance_ordering = ['-search_rank', '-created_at']
+
+    def get_terms(self, request):
+        return search_terms(request.query_params.get(self.search_param, ''))
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return None
+        if not self.get_terms(request) or not is_supported():
+            return None
+        return self.relevance_ordering
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_terms(request)
+        if not terms or not is_supported():
+            return super().filter_queryset(request, queryset, view)
+        match, rank = search_expressions(terms)
+        queryset = queryset.filter(pk__in=match).annotate(search_rank=rank)
+        ordering = self.get_ordering(request, queryset, view)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
@@ -1,16 +1,30 @@
+from django.db import models
 from rest_framework import serializers
+from drf_api.media import MediaImageField, MediaURLField
+from drf_api.fast import (
+    Annotation, DateTime, FastSerializer, ImageURL, IsOwner, Value,
+)
+from drf_api.fieldsets import SparseFieldsetSerializerMixin
+from profiles.models import Profile
 from .models import Post
 from likes.models import Like
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = MediaURLField(source='owner.profile.image')
     is_owner = serializers.SerializerMethodField()
     like_id = serializers.SerializerMethodField()
     comments_count=serializers.ReadOnlyField()
     likes_count=serializers.ReadOnlyField()
+    # Relations read by the method fields, see drf_api/checks.py
+    related_sources = ['owner']
+    # Image URLs are memoized (drf_api/media.py)
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: MediaImageField,
+    }
 
     def validate_image(self, value):
         if value.size > 1024 * 1024 * 2:
@@ -38,6 +52,10 @@ class PostSerializer(serializers.ModelSerializer):
         # If the request is not authenticated, request.user would be an instance of
         # django.contrib.auth.models.AnonymousUser
         user = self.context['request'].user
+        # PostList and PostDetail annotate like_id for the whole page in one
+        # query (see LikeIdMixin in posts/views.py), so there's nothing to look up
+        if hasattr(obj, 'like_id'):
+            return obj.like_id
         if user.is_authenticated:
             # (my text) we filter only those Post instances on .../posts/, where
             # logged-in user (user) is the owner (field in Like model) of the like
@@ -54,4 +72,25 @@ class PostSerializer(serializers.ModelSerializer):
             'id', 'owner', 'is_owner', 'profile_id',
             'profile_image', 'created_at', 'updated_at',
             'title', 'content', 'image', 'image_filter', 'like_id', 'comments_count', 'likes_count'
-       ]
\ No newline at end of file
+       ]
+
+
+class FastPostSerializer(FastSerializer):
+    """PostSerializer for list responses, see drf_api/fast.py."""
+    serializer_class = PostSerializer
+    fields = {
+        'id': Value('id'),
+        'owner': Value('owner__username'),
+        'is_owner': IsOwner('owner_id'),
+        'profile_id': Value('owner__profile__id'),
+        'profile_image': ImageURL('owner__profile__image', Profile, 'image'),
+        'created_at': DateTime('created_at'),
+        'updated_at': DateTime('updated_at'),
+        'title': Value('title'),
+        'content': Value('content'),
+        'image': ImageURL('image', Post, 'image', absolute=True),
+        'image_filter': Value('image_filter'),
+        'like_id': Annotation('like_id'),
+        'comments_count': Value('comments_count'),
+        'likes_count': Value('likes_count'),
+    }
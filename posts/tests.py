@@ -1,3 +1,320 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from comments.models import Comment
+from likes.models import Like
+from .management.commands import refresh_trending
+from .models import Post, TrendingScore
+from .search import search_expressions
+from .serializers import PostSerializer
+from .trending import COMMENT_WEIGHT, LIKE_WEIGHT, POST_WEIGHT, trending_score
+from .views import PostDetail
+
+
+class PostUpdateTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.liker = User.objects.create_user('liker', password='pass')
+        self.post = Post.objects.create(owner=self.owner, title='title')
+        self.client.force_authenticate(self.owner)
+
+    def test_edit_keeps_like_made_while_in_flight(self):
+        # The like lands after get_object() loaded the post for the edit
+        perform_update = PostDetail.perform_update
+
+        def like_then_update(view, serializer):
+            Like.objects.create(owner=self.liker, post=self.post)
+            perform_update(view, serializer)
+
+        with mock.patch.object(PostDetail, 'perform_update', like_then_update):
+            response = self.client.patch(
+                f'/posts/{self.post.pk}/', {'title': 'edited'}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'edited')
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_edit_keeps_counters_after_f_increment(self):
+        post = Post.objects.get(pk=self.post.pk)
+        Post.objects.filter(pk=post.pk).update(comments_count=F('comments_count') + 1)
+        view = PostDetail()
+        serializer = view.get_serializer_class()(
+            post, data={'content': 'edited'}, partial=True,
+            context={'request': None},
+        )
+        serializer.is_valid(raise_exception=True)
+        view.perform_update(serializer)
+        post.refresh_from_db()
+        self.assertEqual(post.content, 'edited')
+        self.assertEqual(post.comments_count, 1)
+
+
+def walk_pages(client, url, link):
+    """The ids of the posts of every page, following the `link` links."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.data
+        ids.extend(post['id'] for post in response.data['results'])
+        url = response.data[link]
+    return ids
+
+
+class PostCursorPaginationTests(APITestCase):
+    def setUp(self):
+        owner = User.objects.create_user('owner', password='pass')
+        # More tied rows than a page, and a few that aren't tied
+        self.posts = [
+            Post.objects.create(owner=owner, title=str(i)) for i in range(25)
+        ]
+        for post in self.posts[:3]:
+            Post.objects.filter(pk=post.pk).update(likes_count=1)
+
+    def test_ties_are_paginated_by_id(self):
+        expected = list(
+            Post.objects.order_by('-likes_count', '-id').values_list('id', flat=True)
+        )
+        forward = walk_pages(
+            self.client, '/posts/?pagination=cursor&ordering=-likes_count', 'next'
+        )
+        self.assertEqual(forward, expected)
+
+        # From the last page back to the first
+        url = '/posts/?pagination=cursor&ordering=-likes_count'
+        response = self.client.get(url)
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+        backward = []
+        while True:
+            backward[:0] = [post['id'] for post in response.data['results']]
+            if not response.data['previous']:
+                break
+            response = self.client.get(response.data['previous'])
+        self.assertEqual(backward, expected)
+
+
+class PostSearchTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+
+    def search(self, query):
+        response = self.client.get('/posts/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [post['id'] for post in response.data['results']]
+
+    def test_title_matches_rank_above_content_matches(self):
+        in_content = Post.objects.create(
+            owner=self.owner, title='notes', content='some django notes'
+        )
+        in_title = Post.objects.create(owner=self.owner, title='django')
+        Post.objects.create(owner=self.owner, title='flask')
+        self.assertEqual(self.search('django'), [in_title.pk, in_content.pk])
+        # The last word is matched as a prefix
+        self.assertEqual(self.search('djan'), [in_title.pk, in_content.pk])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.create(owner=self.owner, title='django')
+        post.title = 'flask'
+        post.save()
+        self.assertEqual(self.search('django'), [])
+        self.assertEqual(self.search('flask'), [post.pk])
+        # Posts are found by their owner's username, also once renamed
+        self.owner.username = 'renamed'
+        self.owner.save()
+        self.assertEqual(self.search('renamed'), [post.pk])
+        post.delete()
+        self.assertEqual(self.search('flask'), [])
+
+    def test_cursor_pagination_keeps_the_relevance_ordering(self):
+        # More tied ranks than a page, and a better match created first
+        best = Post.objects.create(owner=self.owner, title='django')
+        for i in range(12):
+            Post.objects.create(owner=self.owner, title=str(i), content='django notes')
+            Post.objects.create(
+                owner=self.owner, title=str(i), content='django notes and more words'
+            )
+        match, rank = search_expressions(['django'])
+        expected = list(Post.objects.filter(pk__in=match).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', '-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(expected[0], best.pk)
+
+        url = '/posts/?search=django&pagination=cursor'
+        self.assertEqual(walk_pages(self.client, url, 'next'), expected)
+
+
+class PostConditionalUpdateTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.post = Post.objects.create(owner=self.owner, title='title')
+        self.client.force_authenticate(self.owner)
+
+    def test_second_update_with_the_same_etag_fails(self):
+        url = f'/posts/{self.post.pk}/'
+        etag = self.client.get(url)['ETag']
+        with mock.patch.object(
+            PostDetail, 'lock_object', autospec=True,
+            side_effect=PostDetail.lock_object,
+        ) as lock_object:
+            first = self.client.patch(url, {'title': 'first'}, HTTP_IF_MATCH=etag)
+            second = self.client.patch(url, {'title': 'second'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 412)
+        # The row is locked before each If-Match check
+        self.assertEqual(lock_object.call_count, 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'first')
+
+
+@override_settings(TRENDING_EVENT_DELAY=0)
+class TrendingRefreshTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.users = [
+            User.objects.create_user(f'user{number}', password='pass')
+            for number in range(3)
+        ]
+        self.post = Post.objects.create(owner=self.owner, title='title')
+
+    def refresh(self):
+        call_command('refresh_trending', stdout=io.StringIO())
+        return TrendingScore.objects.get(post=self.post)
+
+    def full_score(self):
+        events = [(POST_WEIGHT, self.post.created_at)]
+        events.extend(
+            (LIKE_WEIGHT, created_at)
+            for created_at in
+            Like.objects.filter(post=self.post).values_list('created_at', flat=True)
+        )
+        events.extend(
+            (COMMENT_WEIGHT, created_at)
+            for created_at in
+            Comment.objects.filter(post=self.post).values_list('created_at', flat=True)
+        )
+        return trending_score(events)
+
+    def test_refresh_only_adds_the_new_events(self):
+        Like.objects.create(owner=self.users[0], post=self.post)
+        Comment.objects.create(owner=self.users[1], post=self.post, content='c')
+        self.assertAlmostEqual(self.refresh().score, self.full_score())
+
+        Like.objects.create(owner=self.users[2], post=self.post)
+        with mock.patch.object(
+            refresh_trending, 'trending_score', wraps=trending_score
+        ) as score:
+            row = self.refresh()
+        # The new like only, not the post's earlier events
+        self.assertEqual(len(score.call_args.args[0]), 1)
+        self.assertFalse(row.dirty)
+        self.assertAlmostEqual(row.score, self.full_score())
+
+    def test_deleted_event_recomputes_the_score(self):
+        like = Like.objects.create(owner=self.users[0], post=self.post)
+        Like.objects.create(owner=self.users[1], post=self.post)
+        self.refresh()
+
+        like.delete()
+        row = TrendingScore.objects.get(post=self.post)
+        self.assertTrue(row.dirty)
+        self.assertTrue(row.recompute)
+        row = self.refresh()
+        self.assertFalse(row.recompute)
+        self.assertAlmostEqual(row.score, self.full_score())
+
+    def test_recent_events_wait_for_the_next_run(self):
+        score = self.refresh().score
+        Like.objects.create(owner=self.users[0], post=self.post)
+        with override_settings(TRENDING_EVENT_DELAY=60):
+            row = self.refresh()
+        self.assertEqual(row.score, score)
+        self.assertTrue(row.dirty)
+        self.assertAlmostEqual(self.refresh().score, self.full_score())
+
+
+@override_settings(TRENDING_EVENT_DELAY=0)
+class TrendingOrderingTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.users = [
+            User.objects.create_user(f'user{number}', password='pass')
+            for number in range(3)
+        ]
+        self.posts = [
+            Post.objects.create(owner=self.owner, title=f'post {number}')
+            for number in range(3)
+        ]
+
+    def like(self, post, count):
+        for user in self.users[:count]:
+            Like.objects.create(owner=user, post=post)
+
+    def trending(self, query=''):
+        call_command('refresh_trending', stdout=io.StringIO())
+        return walk_pages(self.client, f'/posts/?ordering=-trending{query}', 'next')
+
+    def test_ordering_follows_the_refreshed_scores(self):
+        first, second, third = self.posts
+        self.like(first, 2)
+        self.like(second, 1)
+        self.assertEqual(self.trending(), [first.pk, second.pk, third.pk])
+
+        self.like(third, 3)
+        self.assertEqual(self.trending(), [third.pk, first.pk, second.pk])
+        self.assertEqual(
+            self.trending('&pagination=cursor'), [third.pk, first.pk, second.pk]
+        )
+
+
+class PostSparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.post = Post.objects.create(owner=self.owner, title='title', content='content')
+        self.client.force_authenticate(self.owner)
+
+    def get(self, url, status=200):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status, response.data)
+        return response.data
+
+    def test_fields_and_omit_in_the_serializer_order(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(FAST_LIST_SERIALIZERS=fast):
+                row, = self.get('/posts/?fields=title,id,like_id')['results']
+                self.assertEqual(list(row), ['id', 'title', 'like_id'])
+                row, = self.get('/posts/?fields=id,title,content&omit=content')['results']
+                self.assertEqual(list(row), ['id', 'title'])
+
+        data = self.get(f'/posts/{self.post.pk}/?omit=content,like_id')
+        self.assertNotIn('content', data)
+        self.assertNotIn('like_id', data)
+        self.assertEqual(data['title'], 'title')
+
+    @override_settings(FAST_LIST_SERIALIZERS=False)
+    def test_left_out_method_fields_are_not_computed(self):
+        with mock.patch.object(PostSerializer, 'get_like_id') as get_like_id:
+            self.get('/posts/?fields=id,title')
+        get_like_id.assert_not_called()
+
+    def test_unknown_fields_are_a_400(self):
+        self.assertEqual(
+            list(self.get('/posts/?fields=id,nope', status=400)), ['fields']
+        )
+        self.assertEqual(
+            list(self.get(f'/posts/{self.post.pk}/?omit=nope', status=400)), ['omit']
+        )
+
+    def test_writes_render_every_field(self):
+        response = self.client.patch(
+            f'/posts/{self.post.pk}/?fields=id', {'title': 'new'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'new')
+        self.assertIn('content', response.data)
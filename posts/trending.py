@@ -0,0 +1,45 @@
+"""
+Trending score of posts, stored in TrendingScore and served by
+?ordering=-trending.
+
+Every like, comment and the post itself is an event whose weight halves
+every TRENDING_HALF_LIFE_HOURS. Instead of decaying the weights towards
+"now", which would change every post's score all the time, they are grown
+away from a fixed EPOCH: an event at time t weighs w * 2^((t - EPOCH) / h).
+Ordering by the sum is the same as ordering by the decayed sum at any given
+moment, and a post's score only changes when it gets a new event, so the
+refresh_trending command only updates the posts touched since its last run,
+by adding the weights of their new events to the stored sum. Only a post
+that lost an event (an unlike, a deleted comment) is recomputed from all of
+its events. The sums grow exponentially with time, so the score stored is
+their natural log.
+"""
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+POST_WEIGHT = 1
+LIKE_WEIGHT = 1
+COMMENT_WEIGHT = 3
+
+
+def log_weight(weight, time):
+    # ln(weight * 2^((time - EPOCH) / half_life))
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    return math.log(weight) + (time - EPOCH).total_seconds() / half_life * math.log(2)
+
+
+def trending_score(events):
+    """Score of an iterable of (weight, time) events, log-sum-exp'ed."""
+    logs = [log_weight(weight, time) for weight, time in events]
+    top = max(logs)
+    return top + math.log(sum(math.exp(value - top) for value in logs))
+
+
+def logaddexp(first, second):
+    """The score of the events of two scores together."""
+    top = max(first, second)
+    return top + math.log1p(math.exp(-abs(first - second)))
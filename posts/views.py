@@ -1,51 +1,109 @@
-from django.db.models import Count
+from django.db.models import F, OuterRef, Subquery
 from rest_framework import permissions, generics, filters
+from drf_api.cache import AnonymousResponseCacheMixin
+from drf_api.conditional import ConditionalDetailMixin
+from drf_api.fast import FastListMixin
+from drf_api.fieldsets import SparseFieldsetMixin
 from drf_api.permissions import IsOwnerOrReadOnly
-from .serializers import PostSerializer
+from drf_api.updates import UpdateFieldsMixin
+from likes.buffer import FlushPendingLikesMixin
+from likes.models import Like
+from .filters import PostFilter
+from .serializers import FastPostSerializer, PostSerializer
 from .models import Post
+from .search import PostSearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
+
+class LikeIdMixin(FlushPendingLikesMixin):
+    # Resolves the current user's like_id for every post of the page inside
+    # the query that fetches the posts (a correlated subquery), so the number
+    # of queries does not grow with the page size.
+    # PostSerializer.get_like_id reads the annotation. Left out when the
+    # client doesn't ask for like_id (?fields=/?omit=, drf_api/fieldsets.py).
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated and self.wants_field('like_id'):
+            queryset = queryset.annotate(
+                like_id=Subquery(
+                    Like.objects.filter(
+                        owner=user, post=OuterRef('pk')
+                    ).values('id')[:1]
+                )
+            )
+        return queryset
+
+
+class PostOrderingFilter(filters.OrderingFilter):
+    # trending comes from the TrendingScore row (posts/trending.py) and is
+    # only joined when the posts are ordered by it. Every post has one, but
+    # a LEFT JOIN makes the database scan all the posts and sort them; the
+    # inner join lets ?ordering=-trending walk posts_trending_score_idx instead
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if ordering and any(field.lstrip('-') == 'trending' for field in ordering):
+            queryset = queryset.filter(trending_score__isnull=False).annotate(
+                trending=F('trending_score__score')
+            )
+        return super().filter_queryset(request, queryset, view)
+
+
+# Everything a post response is built or filtered from
+POST_CACHE_MODELS = [
+    'posts.Post', 'likes.Like', 'comments.Comment',
+    'followers.Follower', 'profiles.Profile', 'auth.User',
+]
+
+
 # comments_count
 # likes_count
-class PostList(generics.ListCreateAPIView):
+class PostList(
+    AnonymousResponseCacheMixin, LikeIdMixin, FastListMixin,
+    SparseFieldsetMixin, generics.ListCreateAPIView
+):
+    cache_models = POST_CACHE_MODELS
     # queryset = Post.objects.all()
-    queryset = Post.objects.annotate(
-        comments_count=Count('comment', distinct=True),
-        likes_count=Count('likes', distinct=True)
-    ).order_by('-created_at')
+    # comments_count and likes_count are stored on Post, trending is
+    # annotated by PostOrderingFilter when the posts are ordered by it
+    queryset = Post.objects.select_related('owner__profile').order_by('-created_at')
     serializer_class = PostSerializer
+    fast_serializer_class = FastPostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter, DjangoFilterBackend,]
-    ordering_fields = ['likes_count', 'comments_count', 'likes__created_at',]
+    filter_backends = [PostOrderingFilter, PostSearchFilter, DjangoFilterBackend,]
+    ordering_fields = [
+        'likes_count', 'comments_count', 'likes__created_at', 'trending',
+    ]
+    # PostSearchFilter ranks matches from a full-text index over the title,
+    # content and owner username; search_fields is only used as the fallback
+    # on databases without full-text support (see posts/search.py)
     search_fields=['owner__username', 'title']
     # 1) showing posts that are owned by users that a particular user is following
-    # i.e., getting the user post feed by their profile id
+    # i.e., getting the user post feed by their profile id (answered from the
+    # follow graph cache, see followers/graph.py)
     # 2) liked by a  particular user - returns all the posts a user with a given id liked
     # 3) owned by a particular user
-    filterset_fields=[
-        'owner__followed__owner__profile',
-        # 1) 'likes': This is the related_name for the ForeignKey relationship from the Like
-        # model to the Post model. It represents the connection from a post to all the
-        # like objects associated with it
-        # 2) '__': In Django's query language, double underscores are used to access related
-        # fields or to apply filters on fields of related models.
-        # 3) 'owner': This is a field in the Like model, which is a ForeignKey to the User
-        # model. It indicates the user who created the like.
-        'likes__owner__profile', # CI suggestion
-        # 'likes__owner', # my suggestion
-        'owner__profile',
-    ]
+    filterset_class = PostFilter
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class PostDetail(generics.RetrieveUpdateDestroyAPIView):
+class PostDetail(
+    ConditionalDetailMixin, AnonymousResponseCacheMixin, LikeIdMixin,
+    SparseFieldsetMixin, UpdateFieldsMixin,
+    generics.RetrieveUpdateDestroyAPIView
+):
+    cache_models = POST_CACHE_MODELS
+    # ETag / If-Match, see drf_api/conditional.py
+    validator_fields = (
+        'updated_at', 'likes_count', 'comments_count',
+        'owner__username', 'owner__profile__image',
+    )
+    user_validator_fields = ('like_id',)
     # queryset = Post.objects.all()
-    queryset = Post.objects.annotate(
-        comments_count=Count('comment', distinct=True),
-        likes_count=Count('likes', distinct=True)
-    ).order_by('-created_at')
+    # comments_count and likes_count are stored on Post
+    queryset = Post.objects.select_related('owner__profile').order_by('-created_at')
     serializer_class = PostSerializer
     permission_classes = [IsOwnerOrReadOnly]
 
@@ -0,0 +1,59 @@
+"""
+Bulk creation of users for data loading (generate_data, import_users).
+
+Saving users one by one runs the create_profile signal receiver and costs at
+least two INSERTs per user. Here a batch of users is inserted with one
+statement, which sends no signals, and their profiles with another.
+"""
+from django.contrib.auth.models import User
+
+from drf_api.bulk import insert_rows
+from .models import Profile
+
+USER_FIELDS = (
+    'username', 'email', 'first_name', 'last_name', 'password',
+    'date_joined', 'is_active', 'is_staff', 'is_superuser',
+)
+PROFILE_FIELDS = ('name', 'content')
+USER_DEFAULTS = {
+    'email': '', 'first_name': '', 'last_name': '',
+    'is_active': True, 'is_staff': False, 'is_superuser': False,
+}
+
+
+def bulk_create_users(users, ignore_conflicts=False):
+    """
+    Insert a batch of users, given as dicts of User fields with at least a
+    username, password and date_joined, and a Profile for each of them.
+    A user's 'profile' key may hold a dict of PROFILE_FIELDS.
+    Return the ids of the users that were created, keyed by username.
+
+    With ignore_conflicts, users whose username is taken, or repeated in the
+    batch, are skipped and left out of the result. Keep batches under ~500
+    users: the usernames are looked up with a single IN (...) query.
+    """
+    if ignore_conflicts:
+        taken = set(User.objects.filter(
+            username__in=[user['username'] for user in users]
+        ).values_list('username', flat=True))
+        unique = []
+        for user in users:
+            if user['username'] not in taken:
+                taken.add(user['username'])
+                unique.append(user)
+        users = unique
+    insert_rows(User, USER_FIELDS, (
+        tuple({**USER_DEFAULTS, **user}[name] for name in USER_FIELDS)
+        for user in users
+    ), ignore_conflicts=ignore_conflicts)
+    # The new primary keys aren't returned by the INSERT
+    ids = dict(User.objects.filter(
+        username__in=[user['username'] for user in users]
+    ).values_list('username', 'id'))
+    insert_rows(Profile, ('owner', 'created_at', 'updated_at') + PROFILE_FIELDS, (
+        (ids[user['username']], user['date_joined'], user['date_joined']) + tuple(
+            user.get('profile', {}).get(name, '') for name in PROFILE_FIELDS
+        )
+        for user in users
+    ))
+    return ids
@@ -0,0 +1,21 @@
+from followers import graph
+from followers.filters import FollowFilter, FollowFilterSet
+from .models import Profile
+
+
+class ProfileFilter(FollowFilterSet):
+    # filter user profiles that follow a user with a given profile_id.
+    owner__following__followed__profile = FollowFilter(
+        graph.FOLLOWERS, field_name='owner__following__followed__profile',
+    )
+    # get all profiles that are followed by a profile, given its id
+    owner__followed__owner__profile = FollowFilter(
+        graph.FOLLOWING, field_name='owner__followed__owner__profile',
+    )
+
+    class Meta:
+        model = Profile
+        fields = [
+            'owner__following__followed__profile',
+            'owner__followed__owner__profile',
+        ]
@@ -0,0 +1,179 @@
+import csv
+import json
+import sys
+import time
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from drf_api.bulk import chunked
+from drf_api.cache import bump_generation
+from profiles.bulk import PROFILE_FIELDS, bulk_create_users
+from profiles.models import Profile
+
+USER_COLUMNS = ('username', 'email', 'first_name', 'last_name', 'password')
+
+
+def read_csv(stream, stderr):
+    yield from csv.DictReader(stream)
+
+
+def read_ndjson(stream, stderr):
+    # A line that isn't a JSON object is reported and read as None, so that
+    # the import carries on and counts it as invalid
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            stderr.write(f'Line {line_number}: invalid JSON ({error})')
+            record = None
+        else:
+            if not isinstance(record, dict):
+                stderr.write(f'Line {line_number}: not a JSON object')
+                record = None
+        yield record
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+class Command(BaseCommand):
+    help = (
+        'Import users and their profiles from a CSV or NDJSON file (or - for '
+        'stdin), streamed and inserted in batches without the per-user '
+        'create_profile signal. Columns: username (required), email, '
+        'first_name, last_name, password (a Django password hash; users '
+        'without one get an unusable password), name and content (profile). '
+        'Usernames that already exist are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin.')
+        parser.add_argument(
+            '--format', choices=READERS,
+            help='Input format; guessed from the file extension by default.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Users inserted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if input_format not in READERS:
+            raise CommandError(
+                f"Can't guess the format of {path}, use --format csv|ndjson."
+            )
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            self.import_users(
+                READERS[input_format](stream, self.stderr), options['batch_size']
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def clean(self, number, record):
+        """Return the record as a user dict for bulk_create_users(), or None."""
+        if record is None:
+            # Already reported by the reader
+            return None
+        try:
+            user = {
+                name: self.get_text(record, name, User, strip=True)
+                for name in USER_COLUMNS
+            }
+            profile = {
+                name: self.get_text(record, name, Profile)
+                for name in PROFILE_FIELDS
+            }
+        except ValidationError as error:
+            self.stderr.write(f'Record {number}: {error.message}')
+            return None
+        username = user['username']
+        try:
+            if not username:
+                raise ValidationError('invalid username')
+            UnicodeUsernameValidator()(username)
+            password = user['password']
+            if password:
+                # Only hashes are accepted: hashing plain text passwords
+                # takes longer per user than the whole import
+                identify_hasher(password)
+        except ValueError:
+            self.stderr.write(f'Record {number}: password is not a Django password hash')
+            return None
+        except ValidationError:
+            self.stderr.write(f'Record {number}: invalid username {username!r}')
+            return None
+        user['password'] = password or self.unusable_password
+        user['date_joined'] = self.now
+        user['profile'] = profile
+        return user
+
+    def get_text(self, record, name, model, strip=False):
+        """
+        Return the record's value for the model's text field `name`, '' if
+        it has none. Values that aren't strings, or longer than the
+        column, raise ValidationError here: in the INSERT they would fail
+        the whole batch.
+        """
+        value = record.get(name)
+        if value is None:
+            return ''
+        if not isinstance(value, str):
+            raise ValidationError(f'{name} is not a string')
+        if strip:
+            value = value.strip()
+        max_length = model._meta.get_field(name).max_length
+        if max_length is not None and len(value) > max_length:
+            raise ValidationError(f'{name} is longer than {max_length} characters')
+        return value
+
+    def import_users(self, records, batch_size):
+        self.now = timezone.now()
+        self.unusable_password = make_password(None)
+        started = time.perf_counter()
+        read = created = invalid = 0
+        reported = 0
+
+        for batch in chunked(enumerate(records, 1), batch_size):
+            users = []
+            for number, record in batch:
+                user = self.clean(number, record)
+                if user is None:
+                    invalid += 1
+                else:
+                    users.append(user)
+            read += len(batch)
+            with transaction.atomic():
+                created += len(bulk_create_users(users, ignore_conflicts=True))
+            elapsed = time.perf_counter() - started
+            if elapsed - reported >= 1:
+                reported = elapsed
+                self.stderr.write(
+                    f'{read:,} records read, {created:,} users created '
+                    f'({created / elapsed:,.0f}/s)'
+                )
+
+        # The bulk inserts don't send the signals that invalidate the cached
+        # responses (drf_api/cache.py)
+        bump_generation(User)
+        bump_generation(Profile)
+
+        elapsed = time.perf_counter() - started
+        skipped = read - created - invalid
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created:,} user(s) in {elapsed:.1f}s '
+            f'({created / elapsed if elapsed else 0:,.0f} users/s); '
+            f'{skipped:,} already existed, {invalid:,} invalid'
+        ))
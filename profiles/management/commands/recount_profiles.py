@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from followers.models import Follower
+from posts.models import Post
+from profiles.models import Profile
+
+
+def count_subquery(model, field):
+    # COUNT(*) of the model's rows whose `field` is the profile owner, 0 if none
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('owner')})
+        .order_by().values(field).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def actual_counts():
+    return {
+        'posts_count': count_subquery(Post, 'owner'),
+        'followers_count': count_subquery(Follower, 'followed'),
+        'following_count': count_subquery(Follower, 'owner'),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the denormalized Profile.posts_count, followers_count and '
+        'following_count counters and repair the profiles that have drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report the profiles whose counters have drifted.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of profiles repaired per UPDATE statement.',
+        )
+
+    def handle(self, *args, **options):
+        drifted = Profile.objects.annotate(**{
+            f'actual_{name}': value for name, value in actual_counts().items()
+        }).exclude(**{
+            name: F(f'actual_{name}') for name in actual_counts()
+        }).order_by('pk').values_list('pk', flat=True)
+        drifted = list(drifted)
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted)} profile(s) have drifted counters')
+            return
+
+        batch_size = options['batch_size']
+        for start in range(0, len(drifted), batch_size):
+            # The counts are recomputed inside the UPDATE itself, so a post or
+            # follow created while the command runs is not lost.
+            Profile.objects.filter(
+                pk__in=drifted[start:start + batch_size]
+            ).update(**actual_counts())
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired the counters of {len(drifted)} profile(s)'
+        ))
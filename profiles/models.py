@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
+from drf_api.cache import bump_generation
+from drf_api.media import forget_image
 
 class Profile(models.Model):
     owner = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -14,9 +16,18 @@ class Profile(models.Model):
     image = models.ImageField(
         upload_to='images/', default='../gennadiy_gaysha_dc8uyh'
     )
+    # Denormalized counters, kept up to date by the Post and Follower signal
+    # receivers (posts/models.py, followers/models.py) and repaired by
+    # `python manage.py recount_profiles`. followers_count is indexed because
+    # listing the most followed profiles is the most common ordering.
+    posts_count = models.IntegerField(default=0)
+    followers_count = models.IntegerField(default=0, db_index=True)
+    following_count = models.IntegerField(default=0)
 
     class Meta:
         ordering = ['-created_at']
+        # Keyset (cursor) pagination on (created_at, id), see drf_api/pagination.py
+        indexes = [models.Index(fields=['-created_at', '-id'])]
 
     def __str__(self):
         return f"{self.owner}'s profile"
@@ -36,3 +47,20 @@ def create_profile(sender, instance, created, **kwargs):
 # The post_save.connect function is used to connect the create_profile function
 # to the post_save signal for the User model.
 post_save.connect(create_profile, sender=User)
+
+# Invalidate the cached anonymous responses built from Profiles and Users,
+# e.g. a new profile image or username (drf_api/cache.py)
+def bump_user_generation(sender, instance, update_fields=None, **kwargs):
+    # Logging in only updates last_login, which no response shows
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        bump_generation(sender)
+
+
+post_save.connect(bump_generation, sender=Profile)
+post_delete.connect(bump_generation, sender=Profile)
+post_save.connect(bump_user_generation, sender=User)
+post_delete.connect(bump_generation, sender=User)
+
+# Forget the memoized URL of the image (drf_api/media.py)
+post_save.connect(forget_image, sender=Profile)
+post_delete.connect(forget_image, sender=Profile)
@@ -1,6 +1,12 @@
 from django.contrib.auth.models import User
+from django.db import models
 from rest_framework import serializers
 
+from drf_api.fast import (
+    Annotation, DateTime, FastSerializer, ImageURL, IsOwner, Value,
+)
+from drf_api.fieldsets import SparseFieldsetSerializerMixin
+from drf_api.media import MediaImageField
 from followers.models import Follower
 from .models import Profile
 
@@ -12,7 +18,7 @@ from .models import Profile
 #         fields = ['username', 'email', 'first_name', 'last_name']  # or any fields you want from the User model
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     # The ReadOnlyField is used here, which means this field is read-only and
     # will not be used for updating or creating a new Profile instance. It's
     # used only for serialization.
@@ -51,6 +57,13 @@ class ProfileSerializer(serializers.ModelSerializer):
     # DRF to call a specific method on the serializer to get the value of the field.
     # id_following_me = serializers.SerializerMethodField()
     following_id = serializers.SerializerMethodField()
+    # Relations read by the method fields, see drf_api/checks.py
+    related_sources = ['owner']
+    # Image URLs are memoized (drf_api/media.py)
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: MediaImageField,
+    }
 
     # Defining the Method: To provide a value for a SerializerMethodField, you define
     # a method on the serializer class with a specific naming pattern: get_<field_name>.
@@ -75,6 +88,10 @@ class ProfileSerializer(serializers.ModelSerializer):
         # the serializer context. This is necessary to determine the current user making
         # the request
         user = self.context['request'].user
+        # ProfileList and ProfileDetail annotate following_id for the whole page
+        # in one query (see FollowingIdMixin in profiles/views.py)
+        if hasattr(obj, 'following_id'):
+            return obj.following_id
         # The method checks if the current user is authenticated. If not, the method
         # returns None because an unauthenticated user cannot be following anyone.
         if user.is_authenticated:
@@ -133,3 +150,22 @@ class ProfileSerializer(serializers.ModelSerializer):
 # user.followed.all() fetches all instances of Follower where the specified user is
 # the followed (i.e., the one being followed).
 # It's a way to get all the users who are following a specific user.
+
+
+class FastProfileSerializer(FastSerializer):
+    """ProfileSerializer for list responses, see drf_api/fast.py."""
+    serializer_class = ProfileSerializer
+    fields = {
+        'id': Value('id'),
+        'owner': Value('owner__username'),
+        'created_at': DateTime('created_at'),
+        'updated_at': DateTime('updated_at'),
+        'name': Value('name'),
+        'content': Value('content'),
+        'image': ImageURL('image', Profile, 'image', absolute=True),
+        'is_owner': IsOwner('owner_id'),
+        'following_id': Annotation('following_id'),
+        'posts_count': Value('posts_count'),
+        'followers_count': Value('followers_count'),
+        'following_count': Value('following_count'),
+    }
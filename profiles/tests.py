@@ -1,3 +1,112 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import F
 from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from followers.models import Follower
+from posts.models import Post
+from .models import Profile
+from .views import ProfileDetail
+
+
+class ProfileUpdateTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.follower = User.objects.create_user('follower', password='pass')
+        self.profile = Profile.objects.get(owner=self.owner)
+        self.client.force_authenticate(self.owner)
+
+    def test_edit_keeps_follow_and_post_made_while_in_flight(self):
+        # The follow and the post land after get_object() loaded the
+        # profile for the edit
+        perform_update = ProfileDetail.perform_update
+
+        def follow_and_post_then_update(view, serializer):
+            Follower.objects.create(owner=self.follower, followed=self.owner)
+            Post.objects.create(owner=self.owner, title='title')
+            perform_update(view, serializer)
+
+        with mock.patch.object(
+            ProfileDetail, 'perform_update', follow_and_post_then_update
+        ):
+            response = self.client.patch(
+                f'/profiles/{self.profile.pk}/', {'name': 'edited'}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.name, 'edited')
+        self.assertEqual(self.profile.followers_count, 1)
+        self.assertEqual(self.profile.posts_count, 1)
+
+    def test_edit_keeps_counters_after_f_increment(self):
+        profile = Profile.objects.get(pk=self.profile.pk)
+        Profile.objects.filter(pk=profile.pk).update(
+            following_count=F('following_count') + 1
+        )
+        view = ProfileDetail()
+        serializer = view.get_serializer_class()(
+            profile, data={'content': 'edited'}, partial=True,
+            context={'request': None},
+        )
+        serializer.is_valid(raise_exception=True)
+        view.perform_update(serializer)
+        profile.refresh_from_db()
+        self.assertEqual(profile.content, 'edited')
+        self.assertEqual(profile.following_count, 1)
+
+
+class ImportUsersTests(TestCase):
+    def import_lines(self, lines):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.ndjson', encoding='utf-8', delete=False
+        ) as file:
+            file.write('\n'.join(lines) + '\n')
+        self.addCleanup(os.remove, file.name)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_users', file.name, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def usernames(self):
+        return sorted(User.objects.values_list('username', flat=True))
+
+    def test_invalid_ndjson_lines_are_reported_and_skipped(self):
+        stdout, stderr = self.import_lines([
+            '{"username": "first", "name": "First"}',
+            '{"username": "broken",',
+            '',
+            '["not", "an", "object"]',
+            '{"username": "second"}',
+        ])
+        self.assertIn('Line 2: invalid JSON', stderr)
+        self.assertIn('Line 4: not a JSON object', stderr)
+        self.assertIn('2 user(s)', stdout)
+        self.assertIn('2 invalid', stdout)
+        self.assertEqual(self.usernames(), ['first', 'second'])
+        self.assertEqual(Profile.objects.get(owner__username='first').name, 'First')
 
-# Create your tests here.
+    def test_records_with_bad_types_or_lengths_are_reported_and_skipped(self):
+        stdout, stderr = self.import_lines([
+            '{"username": 123}',
+            '{"username": "typed", "email": ["a@example.com"]}',
+            json.dumps({'username': 'long_email', 'email': 'a' * 250 + '@b.cd'}),
+            json.dumps({'username': 'long_last', 'last_name': 'x' * 151}),
+            json.dumps({'username': 'long_name', 'name': 'x' * 256}),
+            json.dumps({'username': 'u' * 151}),
+            json.dumps({'username': 'kept', 'name': 'x' * 255, 'content': 'y' * 5000}),
+        ])
+        self.assertIn('Record 1: username is not a string', stderr)
+        self.assertIn('Record 2: email is not a string', stderr)
+        self.assertIn('Record 3: email is longer than 254 characters', stderr)
+        self.assertIn('Record 4: last_name is longer than 150 characters', stderr)
+        self.assertIn('Record 5: name is longer than 255 characters', stderr)
+        self.assertIn('Record 6: username is longer than 150 characters', stderr)
+        self.assertIn('1 user(s)', stdout)
+        self.assertIn('6 invalid', stdout)
+        self.assertEqual(self.usernames(), ['kept'])
@@ -1,49 +1,91 @@
-from django.db.models import Count
+from django.db.models import OuterRef, Subquery
 from rest_framework import generics, filters
+from drf_api.cache import AnonymousResponseCacheMixin
+from drf_api.conditional import ConditionalDetailMixin
+from drf_api.fast import FastListMixin
+from drf_api.fieldsets import SparseFieldsetMixin
 from drf_api.permissions import IsOwnerOrReadOnly
-from .serializers import ProfileSerializer
+from drf_api.updates import UpdateFieldsMixin
+from followers.models import Follower
+from .filters import ProfileFilter
+from .serializers import FastProfileSerializer, ProfileSerializer
 from .models import Profile
 from django_filters.rest_framework import DjangoFilterBackend
 
 
+class FollowingIdMixin:
+    # Resolves the id of the current user's Follower row for every profile of
+    # the page inside the query that fetches the profiles (a correlated
+    # subquery), instead of one Follower query per serialized profile.
+    # ProfileSerializer.get_following_id reads the annotation. Left out when
+    # the client doesn't ask for following_id (?fields=/?omit=,
+    # drf_api/fieldsets.py).
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated and self.wants_field('following_id'):
+            queryset = queryset.annotate(
+                following_id=Subquery(
+                    Follower.objects.filter(
+                        owner=user, followed=OuterRef('owner')
+                    ).values('id')[:1]
+                )
+            )
+        return queryset
+
+
+# Everything a profile response is built or filtered from
+PROFILE_CACHE_MODELS = [
+    'profiles.Profile', 'posts.Post', 'followers.Follower', 'auth.User',
+]
+
+
 # posts_count
 # followers_count
 # following_count
-class ProfileList(generics.ListAPIView):
+class ProfileList(
+    AnonymousResponseCacheMixin, FollowingIdMixin, FastListMixin,
+    SparseFieldsetMixin, generics.ListAPIView
+):
+    cache_models = PROFILE_CACHE_MODELS
     # queryset = Profile.objects.all()
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__post', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
-    ).order_by('-created_at')
+    # posts_count, followers_count and following_count are stored on Profile
+    queryset = Profile.objects.select_related('owner').order_by('-created_at')
     serializer_class = ProfileSerializer
+    fast_serializer_class = FastProfileSerializer
     filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
     ordering_fields = [
         'posts_count',
         'followers_count',
-        'following_count'
+        'following_count',
         'owner__following__created_at',
         'owner__followed__created_at',
 
     ]
 
-    filterset_fields = [
-        # filter user profiles that  follow a user with a given profile_id.
-        'owner__following__followed__profile',
-        # get all profiles that are followed by a profile, given its id
-        'owner__followed__owner__profile'
-    ]
+    # filter user profiles that follow a user with a given profile_id
+    # (owner__following__followed__profile), or that are followed by a
+    # profile (owner__followed__owner__profile); both are answered from the
+    # follow graph cache, see followers/graph.py
+    filterset_class = ProfileFilter
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
-class ProfileDetail(generics.RetrieveUpdateAPIView):
+class ProfileDetail(
+    ConditionalDetailMixin, AnonymousResponseCacheMixin, FollowingIdMixin,
+    SparseFieldsetMixin, UpdateFieldsMixin, generics.RetrieveUpdateAPIView
+):
+    cache_models = PROFILE_CACHE_MODELS
+    # ETag / If-Match, see drf_api/conditional.py
+    validator_fields = (
+        'updated_at', 'posts_count', 'followers_count', 'following_count',
+        'owner__username',
+    )
+    user_validator_fields = ('following_id',)
     # queryset = Profile.objects.all()
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__post', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
-    ).order_by('-created_at')
+    # posts_count, followers_count and following_count are stored on Profile
+    queryset = Profile.objects.select_related('owner').order_by('-created_at')
     serializer_class = ProfileSerializer
     permission_classes = [IsOwnerOrReadOnly]